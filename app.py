@@ -1,17 +1,21 @@
 import os
 import logging
+import time
 
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 
-logging.basicConfig(level=logging.DEBUG)
+import database
+
+# DEBUG logs every request and SQLAlchemy detail; opt in with LOG_LEVEL=DEBUG
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 
 class Base(DeclarativeBase):
     pass
 
-db = SQLAlchemy(model_class=Base)
+db = SQLAlchemy(model_class=Base, session_options={"class_": database.RoutingSession})
 
 # create the app
 app = Flask(__name__)
@@ -20,24 +24,152 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # configure the database, relative to the app instance folder
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///ukrainian_app.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = database.engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+# Optional read replicas, comma separated; GET requests read from them
+app.config["DATABASE_REPLICA_URLS"] = [u.strip() for u in os.environ.get("DATABASE_REPLICA_URLS", "").split(",") if u.strip()]
+app.config["SQLALCHEMY_BINDS"] = database.binds(app.config["SQLALCHEMY_DATABASE_URI"], app.config["DATABASE_REPLICA_URLS"])
+app.config["RESPONSE_CACHE_URL"] = os.environ.get("RESPONSE_CACHE_URL")
+app.config["RESPONSE_CACHE_TIMEOUT"] = int(os.environ.get("RESPONSE_CACHE_TIMEOUT", 300))
+app.config["AUTO_INIT_DB"] = os.environ.get("AUTO_INIT_DB", "").lower() in ("1", "true", "yes")
+app.config["SLOW_QUERY_MS"] = float(os.environ.get("SLOW_QUERY_MS", 100))
+app.config["SLOW_QUERY_SAMPLE"] = float(os.environ.get("SLOW_QUERY_SAMPLE", 1.0))
+app.config["COMPRESSION_MIN_SIZE"] = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
 
 # initialize the app with the extension
 db.init_app(app)
 
-with app.app_context():
-    # Import models and routes
-    import models
-    import routes
+_created = False
+
+def create_app():
+    """Register models, routes and commands and wire up the derived caches.
+
+    Nothing here talks to the database: tables are created by
+    `flask db-init`, default content is loaded by `flask seed`, and the
+    in-memory indexes fill on first use (or from the warm-up hook).
+    """
+    global _created
+    if _created:
+        return app
     
-    # Create all database tables
-    db.create_all()
+    started = time.perf_counter()
+    with app.app_context():
+        # Import models and routes
+        import models
+        import routes
+        import commands
+        # Columns derived from others when rows are written
+        import lesson_content
+        import summaries
+        
+        # gzip/brotli for responses; registered first so it runs after every
+        # other after_request hook and sees the final body
+        from compression import compression
+        compression.init_app(app)
+        
+        # Content-hashed static URLs and the service worker's precache list
+        from assets import assets
+        assets.init_app(app)
+        
+        # Query counts and timings per request, Server-Timing and /metrics
+        from instrumentation import instrumentation
+        instrumentation.init_app(app)
+        
+        # Publish committed writes to the structures derived from them
+        from changefeed import changefeed
+        changefeed.install(*models.CONTENT_MODELS, versions=models.ContentVersion)
+        # Registered ahead of the timeline and cache hooks, so those already
+        # see the writes of other workers
+        changefeed.init_app(app, db)
+        
+        # In-memory phrase index used by /api/translate
+        from translation_engine import phrase_index
+        changefeed.subscribe(phrase_index.apply, models.Translation)
+        from fuzzy import fuzzy_index
+        changefeed.subscribe(fuzzy_index.apply, models.Translation)
+        
+        # Category counts behind the filter sidebars and /api/facets
+        from facets import facets
+        changefeed.subscribe(facets.apply, *facets.models)
+        
+        # Upcoming/past events window, rolled over as event dates pass
+        from timeline import timeline
+        timeline.init_app(app)
+        changefeed.subscribe(timeline.apply, models.Event)
+        
+        # Full-text search index
+        from search import search_index, SEARCHABLES
+        # The index lives in the database, so only the writing process updates it
+        changefeed.subscribe(search_index.apply, *[s.model for s in SEARCHABLES], local_only=True)
+        
+        # Rendered public pages, evicted by the models they read
+        from cache import response_cache
+        response_cache.init_app(app)
+        changefeed.subscribe(response_cache.apply)
+        timeline.subscribe(response_cache.apply)
+        
+        # Version stamps behind the ETag/Last-Modified validators
+        from versioning import model_versions
+        # Event pages also change when an event's date passes
+        model_versions.depends(models.Event, timeline.boundary)
+        
+        if app.config["AUTO_INIT_DB"]:
+            # Opt-in for single-process setups that have no deploy step
+            from schema import init_database
+            init_database(db)
+            models.initialize_default_data()
     
-    # Initialize default data
-    models.initialize_default_data()
+    _created = True
+    app.config["BOOT_SECONDS"] = time.perf_counter() - started
+    app.logger.info("App created in %.1f ms", app.config["BOOT_SECONDS"] * 1000)
+    return app
+
+def warm_up():
+    """Fill the in-memory indexes and caches now rather than on first use.
+
+    Under gunicorn this runs in the master before it forks, so every worker
+    starts warm and shares the built structures copy-on-write.  Database
+    connections opened here are closed again; a forked worker must not
+    reuse its parent's sockets.
+    """
+    started = time.perf_counter()
+    with app.app_context():
+        import models
+        from sqlalchemy.orm import load_only
+        from translation_engine import phrase_index
+        from fuzzy import fuzzy_index
+        from facets import facets
+        from timeline import timeline
+        from lesson_content import lesson_fragments
+        from phrasebook import phrasebook_bundle
+        from versioning import model_versions
+        from changefeed import changefeed
+        
+        # The versions everything below is built from; workers reload
+        # whatever is written after this
+        changefeed.sync(db.session)
+        phrase_index.ensure_loaded()
+        fuzzy_index.ensure_loaded()
+        facets.load()
+        timeline.ensure_loaded()
+        lessons = models.Lesson.query.options(
+            load_only(models.Lesson.content_hash, models.Lesson.rendered_html)
+        ).order_by(models.Lesson.order_index).limit(lesson_fragments.max_entries)
+        for lesson in lessons:
+            lesson_fragments.get(lesson)
+        phrasebook_bundle.get(model_versions.stamp([models.Translation])[0])
+        db.session.remove()
+        db.engine.dispose()
+    app.logger.info("Caches warmed in %.1f ms", (time.perf_counter() - started) * 1000)
+
+def after_fork():
+    """Per-worker setup for a process forked from a warmed-up master"""
+    with app.app_context():
+        # Pooled connections belong to the parent; drop them without closing
+        db.engine.dispose(close=False)
+    from timeline import timeline
+    timeline.after_fork()
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Run through main so routes register on the importable `app` module
+    from main import run_dev_server
+    run_dev_server()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import shutil
+
+from flask import Response, request
+
+from compression import COMPRESSED_SUFFIXES
+
+# Hashed copies and their manifest, under the static folder
+BUILD_DIR = 'dist'
+MANIFEST_NAME = 'assets.json'
+HASH_LENGTH = 12
+# Served from a fixed URL: browsers find service worker updates by refetching it
+SERVICE_WORKER = 'sw.js'
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def source_files(folder):
+    """Static files to fingerprint, as paths relative to ``folder``"""
+    names = []
+    for root, dirs, files in os.walk(folder):
+        if root == folder and BUILD_DIR in dirs:
+            dirs.remove(BUILD_DIR)
+        for name in files:
+            path = os.path.relpath(os.path.join(root, name), folder).replace(os.sep, '/')
+            if path != SERVICE_WORKER and not name.endswith(COMPRESSED_SUFFIXES):
+                names.append(path)
+    return sorted(names)
+
+
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+
+
+def fingerprint(folder):
+    """(hashes per source file, version of the whole set)"""
+    hashes = {name: file_hash(os.path.join(folder, name)) for name in source_files(folder)}
+    version = hashlib.sha256(json.dumps(hashes, sort_keys=True).encode()).hexdigest()[:HASH_LENGTH]
+    return hashes, version
+
+
+def hashed_name(name, digest):
+    stem, ext = os.path.splitext(name)
+    return f'{BUILD_DIR}/{stem}.{digest}{ext}'
+
+
+def build_assets(folder):
+    """Copy each static file to a content-hashed name under ``dist/`` and write the manifest.
+
+    The previous build's files are kept, since pages rendered before the
+    deploy still link them; older builds are removed.  Returns the manifest.
+    """
+    hashes, version = fingerprint(folder)
+    build = os.path.join(folder, BUILD_DIR)
+    keep = set()
+    try:
+        with open(os.path.join(build, MANIFEST_NAME)) as f:
+            keep.update(json.load(f)['files'].values())
+    except (FileNotFoundError, ValueError, KeyError):
+        shutil.rmtree(build, ignore_errors=True)
+    files = {}
+    for name, digest in hashes.items():
+        files[name] = hashed_name(name, digest)
+        target = os.path.join(folder, files[name])
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copy2(os.path.join(folder, name), target)
+    manifest = {'version': version, 'files': files}
+    os.makedirs(build, exist_ok=True)
+    with open(os.path.join(build, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    keep.update(files.values())
+    for root, _, names in os.walk(build):
+        for name in names:
+            path = os.path.relpath(os.path.join(root, name), folder).replace(os.sep, '/')
+            for suffix in COMPRESSED_SUFFIXES:
+                path = path.removesuffix(suffix)
+            if name != MANIFEST_NAME and path not in keep:
+                os.remove(os.path.join(root, name))
+    return manifest
+
+
+class Assets:
+    """Content-hashed static URLs.
+
+    After `flask build-assets`, ``url_for('static', filename=...)`` points
+    at the hashed copy of the file, which is served as immutable for a
+    year; a new build changes the URL instead of the content behind it.
+    Without a build, URLs are the plain ones and browsers revalidate.
+    The service worker is served from ``/sw.js`` with the manifest's
+    asset URLs and version prepended.
+    """
+
+    def __init__(self):
+        self.files = {}
+        self.version = None
+        self.folder = None
+        # (file stats, fingerprint) of the unbuilt static folder
+        self._fingerprint = None
+
+    def init_app(self, app):
+        self.folder = app.static_folder
+        self.load()
+        app.url_defaults(self._hashed_url)
+        app.after_request(self._cache_headers)
+        app.add_url_rule('/sw.js', 'service_worker', self.service_worker)
+
+    def load(self):
+        path = os.path.join(self.folder, BUILD_DIR, MANIFEST_NAME)
+        try:
+            with open(path) as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            self.files = {}
+            self.version = None
+            return
+        self.files = manifest['files']
+        self.version = manifest['version']
+
+    def url(self, filename):
+        return self.files.get(filename, filename)
+
+    def _hashed_url(self, endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = self.url(values['filename'])
+
+    def _cache_headers(self, response):
+        filename = (request.view_args or {}).get('filename', '')
+        if request.endpoint == 'static' and filename.startswith(BUILD_DIR + '/') and response.status_code in (200, 304):
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    def precache(self):
+        """(version, URLs) of the static assets the service worker caches at install"""
+        if self.version is not None:
+            files, version = self.files, self.version
+        else:
+            # No build: version the plain files so edits still reach clients
+            hashes, version = self.unbuilt_fingerprint()
+            files = {name: name for name in hashes}
+        urls = ['/static/' + path for name, path in files.items() if name.endswith(('.css', '.js', '.json'))]
+        return version, urls
+
+    def unbuilt_fingerprint(self):
+        """``fingerprint`` of the static folder, rehashed only after a file changes"""
+        stats = []
+        for name in source_files(self.folder):
+            stat = os.stat(os.path.join(self.folder, name))
+            stats.append((name, stat.st_mtime_ns, stat.st_size))
+        if self._fingerprint is None or self._fingerprint[0] != stats:
+            self._fingerprint = (stats, fingerprint(self.folder))
+        return self._fingerprint[1]
+
+    def service_worker(self):
+        version, urls = self.precache()
+        with open(os.path.join(self.folder, SERVICE_WORKER)) as f:
+            script = f.read()
+        header = 'self.ASSET_MANIFEST = %s;\n' % json.dumps({'version': version, 'assets': urls})
+        response = Response(header + script, mimetype='text/javascript')
+        # Always revalidated, so a new build's worker is picked up on the next visit
+        response.cache_control.no_cache = True
+        response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+        return response.make_conditional(request)
+
+
+assets = Assets()
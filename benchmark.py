@@ -0,0 +1,312 @@
+"""Route benchmarks over synthetic data.
+
+    python benchmark.py --database sqlite:////tmp/bench.db --scale 1000 --scale 100000
+    python benchmark.py --database postgresql://localhost/bench --scale 1000000 --output bench.json
+    python benchmark.py --scale 1000 --baseline bench.json
+
+Each (database, scale) pair runs in its own process, since the app binds
+its database at import.  The database is seeded with ``scale`` synthetic
+translations and a tenth as many events and resources on top of the
+default content, then every route is driven through the Flask test
+client.  Seeding is skipped when the database already holds that much
+data, so repeated runs compare like with like.  Results are JSON: per
+route latency percentiles, throughput, queries per request and peak
+allocated memory.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+DEFAULT_DATABASE = 'sqlite:////tmp/ukrainian_bench.db'
+DEFAULT_REQUESTS = 100
+# Events and resources seeded per translation
+SECONDARY_RATIO = 0.1
+RANDOM_SEED = 20240601
+# A route is reported as regressed when its p95 grows by more than this
+REGRESSION_THRESHOLD = 0.2
+
+LEARNER = 'benchmark-learner'
+
+# (name, method, path, request options).  ``{lesson}`` is filled with a
+# lesson id from the seeded database.
+TARGETS = [
+    ('index', 'GET', '/', {}),
+    ('translator', 'GET', '/translator', {}),
+    ('api_translations', 'GET', '/api/translations?limit=100', {}),
+    ('api_translations_category', 'GET', '/api/translations?category=greetings&limit=100', {}),
+    ('api_translations_search', 'GET', '/api/translations?search=%D1%81%D0%BB&limit=100', {}),
+    ('api_translations_bundle', 'GET', '/api/translations/bundle', {}),
+    ('api_translations_delta', 'GET', '/api/translations/delta?since=0', {}),
+    ('api_facets', 'GET', '/api/facets', {}),
+    ('api_translate', 'GET', '/api/translate?q=%D0%B4%D1%8F%D0%BA%D1%83%D1%8E', {}),
+    ('api_translate_fuzzy', 'GET', '/api/translate?q=dyakuyu+duzhe', {}),
+    ('lessons', 'GET', '/lessons', {}),
+    ('lesson_detail', 'GET', '/lessons/{lesson}', {}),
+    ('lesson_body', 'GET', '/lessons/{lesson}/content', {'headers': {'Accept-Encoding': 'gzip'}}),
+    ('api_progress', 'GET', '/api/progress', {'headers': {'X-Learner-Id': LEARNER}}),
+    ('api_reviews_due', 'GET', '/api/reviews/due?new=10', {'headers': {'X-Learner-Id': LEARNER}}),
+    ('api_practice_score', 'POST', '/api/practice/score', {'json': {'attempts': [
+        {'transcript': 'dyakuyu', 'expected': 'Дякую'},
+        {'transcript': 'pryvit', 'expected': 'Привіт'},
+    ] * 10}}),
+    ('community', 'GET', '/community', {}),
+    ('heritage', 'GET', '/heritage', {}),
+    ('events', 'GET', '/events', {}),
+    ('events_ics', 'GET', '/events.ics', {}),
+    ('resources', 'GET', '/resources', {}),
+    ('admin', 'GET', '/admin', {}),
+    ('admin_translations', 'GET', '/admin/translations?page=2', {}),
+    ('search', 'GET', '/search?q=Ukrainian', {}),
+    ('metrics', 'GET', '/metrics', {}),
+    ('service_worker', 'GET', '/sw.js', {}),
+]
+# Endpoints that write; benchmarking them would change the data under test
+SKIPPED = {'admin_bulk', 'static'}
+
+UKRAINIAN_LETTERS = 'абвгґдеєжзиіїйклмнопрстуфхцчшщьюя'
+ENGLISH_LETTERS = 'abcdefghijklmnopqrstuvwxyz'
+
+
+def words(rng, letters, count):
+    return ' '.join(''.join(rng.choices(letters, k=rng.randint(3, 9))) for _ in range(count))
+
+
+def choices(form_field):
+    return [value for value, _ in form_field.kwargs['choices'] if value]
+
+
+def synthetic_rows(scale, seed=RANDOM_SEED):
+    """Deterministic importer rows for each dataset at ``scale``"""
+    from forms import TranslationForm, EventForm, ResourceForm
+
+    rng = random.Random(seed)
+    categories = choices(TranslationForm.category)
+    levels = choices(TranslationForm.difficulty_level)
+    translations = [
+        {'ukrainian': 'слово %d %s' % (n, words(rng, UKRAINIAN_LETTERS, rng.randint(1, 3))),
+         'english': 'word %d %s' % (n, words(rng, ENGLISH_LETTERS, rng.randint(1, 3))),
+         'pronunciation': words(rng, ENGLISH_LETTERS, 2),
+         'category': rng.choice(categories),
+         'subcategory': rng.choice(levels),
+         'difficulty_level': rng.choice(levels)}
+        for n in range(scale)
+    ]
+    secondary = max(1, int(scale * SECONDARY_RATIO))
+    events = [
+        {'title': 'Event %d' % n,
+         'description': words(rng, ENGLISH_LETTERS, 40),
+         # Spread over three years around the run, so both lists fill
+         'date': datetime.utcnow() - timedelta(days=540) + timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60)),
+         'location': words(rng, ENGLISH_LETTERS, 3),
+         'organizer': words(rng, ENGLISH_LETTERS, 2),
+         'category': rng.choice(choices(EventForm.category))}
+        for n in range(secondary)
+    ]
+    resources = [
+        {'title': 'Resource %d' % n,
+         'description': words(rng, ENGLISH_LETTERS, 40),
+         'category': rng.choice(choices(ResourceForm.category)),
+         'website': 'https://example.org/%d' % n,
+         'phone': '204-555-%04d' % (n % 10000)}
+        for n in range(secondary)
+    ]
+    return {'translations': translations, 'events': events, 'resources': resources}
+
+
+def seed(scale):
+    """Seed the bound database up to ``scale``; returns row counts and seconds spent"""
+    from app import db
+    from importer import import_records
+    from models import Translation, Event, Resource, initialize_default_data
+    from schema import init_database
+
+    started = time.perf_counter()
+    init_database(db)
+    initialize_default_data()
+    if Translation.query.count() < scale:
+        for name, rows in synthetic_rows(scale).items():
+            import_records(name, rows)
+    return {
+        'translations': Translation.query.count(),
+        'events': Event.query.count(),
+        'resources': Resource.query.count(),
+    }, time.perf_counter() - started
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(client, method, path, options, requests, counter):
+    """Time one target: a cold first request, then ``requests`` warm ones"""
+    counter[0] = 0
+    started = time.perf_counter()
+    response = client.open(path, method=method, **options)
+    first_ms = (time.perf_counter() - started) * 1000
+    first_queries = counter[0]
+
+    timings = []
+    counter[0] = 0
+    total_started = time.perf_counter()
+    for _ in range(requests):
+        started = time.perf_counter()
+        client.open(path, method=method, **options)
+        timings.append((time.perf_counter() - started) * 1000)
+    total = time.perf_counter() - total_started
+    queries = counter[0] / requests
+
+    # Allocation tracing slows everything down, so it gets its own pass
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    client.open(path, method=method, **options)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'status': response.status_code,
+        'bytes': len(response.get_data()),
+        'first_ms': round(first_ms, 3),
+        'first_queries': first_queries,
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p95_ms': round(percentile(timings, 0.95), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'requests_per_second': round(requests / total, 1),
+        'queries_per_request': round(queries, 2),
+        'peak_alloc_kb': round(peak / 1024, 1),
+    }
+
+
+def run(database, scale, requests, only=None):
+    """Benchmark every target against ``database``.  Runs in a worker process."""
+    os.environ['DATABASE_URL'] = database
+    os.environ.pop('AUTO_INIT_DB', None)
+    from main import app
+    from app import db
+    from models import Lesson
+    from sqlalchemy import event
+
+    # Request logging would dominate the timings
+    logging.disable(logging.WARNING)
+    with app.app_context():
+        counts, seed_seconds = seed(scale)
+        lesson = db.session.query(Lesson.id).order_by(Lesson.order_index).first()[0]
+        dialect = db.engine.dialect.name
+        counter = [0]
+
+        def count_query(*args):
+            counter[0] += 1
+
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+
+    client = app.test_client()
+    urls = app.url_map.bind('localhost')
+    results = {}
+    driven = set()
+    for name, method, path, options in TARGETS:
+        if only and name not in only:
+            continue
+        path = path.format(lesson=lesson)
+        results[name] = dict(measure(client, method, path, options, requests, counter), path=path)
+        driven.add(urls.match(path.split('?')[0], method=method)[0])
+
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules()}
+    return {
+        'meta': {
+            'database': dialect,
+            'scale': scale,
+            'rows': counts,
+            'seed_seconds': round(seed_seconds, 2),
+            'boot_ms': round(app.config['BOOT_SECONDS'] * 1000, 1),
+            'requests_per_route': requests,
+            'python': platform.python_version(),
+            'unbenchmarked': sorted(endpoints - driven - SKIPPED),
+            'max_rss_kb': max_rss_kb(),
+        },
+        'routes': results,
+    }
+
+
+def max_rss_kb():
+    try:
+        import resource
+    except ImportError:  # not on Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def compare(results, baseline):
+    """(run, route, baseline p95, p95) for routes that got slower than the threshold"""
+    previous = {(r['meta']['database'], r['meta']['scale']): r for r in baseline}
+    regressions = []
+    for result in results:
+        before = previous.get((result['meta']['database'], result['meta']['scale']))
+        if before is None:
+            continue
+        for name, stats in result['routes'].items():
+            old = before['routes'].get(name)
+            if old and stats['p95_ms'] > old['p95_ms'] * (1 + REGRESSION_THRESHOLD):
+                run_name = '%s@%d' % (result['meta']['database'], result['meta']['scale'])
+                regressions.append((run_name, name, old['p95_ms'], stats['p95_ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--database', action='append',
+                        help='Database URL to benchmark against (repeatable). It is seeded, so not production.')
+    parser.add_argument('--scale', action='append', type=int,
+                        help='Synthetic translations to seed (repeatable, default 1000)')
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help='Timed requests per route')
+    parser.add_argument('--route', action='append', help='Only benchmark these targets')
+    parser.add_argument('--output', help='Write the JSON results here instead of stdout')
+    parser.add_argument('--baseline', help='Earlier results to compare p95 latencies against')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    databases = args.database or [DEFAULT_DATABASE]
+    scales = args.scale or [1000]
+
+    if args.worker:
+        json.dump(run(databases[0], scales[0], args.requests, args.route), sys.stdout)
+        return 0
+
+    results = []
+    for database in databases:
+        for scale in scales:
+            command = [sys.executable, os.path.abspath(__file__), '--worker', '--database', database,
+                       '--scale', str(scale), '--requests', str(args.requests)]
+            for route in args.route or ():
+                command += ['--route', route]
+            print(f"Benchmarking {scale} rows on {database}", file=sys.stderr)
+            worker = subprocess.run(command, stdout=subprocess.PIPE, check=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__)))
+            results.append(json.loads(worker.stdout))
+
+    report = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f))
+        for run_name, name, before, after in regressions:
+            print(f"REGRESSED {run_name} {name}: p95 {before} ms -> {after} ms", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
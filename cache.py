@@ -0,0 +1,181 @@
+import logging
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import request, session, make_response
+
+from versioning import model_versions
+
+logger = logging.getLogger(__name__)
+
+# Bounds how long an entry can outlive a write its process never heard of
+DEFAULT_TIMEOUT = 300
+
+
+def model_tag(model):
+    return model.__tablename__
+
+
+class LRUBackend:
+    """In-process LRU, one per worker"""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                return None
+            value, tags, expires = item
+            if expires is not None and expires < time.monotonic():
+                self._discard(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags=(), timeout=None):
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, tags, expires)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._discard(next(iter(self._entries)))
+
+    def invalidate(self, tags):
+        with self._lock:
+            for tag in tags:
+                for key in list(self._tags.get(tag, ())):
+                    self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def _discard(self, key):
+        item = self._entries.pop(key, None)
+        if item is None:
+            return
+        for tag in item[1]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisBackend:
+    """Shared cache in a local Redis-compatible server.
+
+    Every worker sees the same entries and the same evictions, so a write
+    handled by one worker invalidates the pages cached by all of them.
+    """
+
+    def __init__(self, url, prefix='response-cache:'):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        data = self.client.get(self.prefix + key)
+        return pickle.loads(data) if data is not None else None
+
+    def set(self, key, value, tags=(), timeout=None):
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, pickle.dumps(value), ex=timeout)
+        for tag in tags:
+            pipe.sadd(self.prefix + 'tag:' + tag, key)
+        pipe.execute()
+
+    def invalidate(self, tags):
+        for tag in tags:
+            tag_key = self.prefix + 'tag:' + tag
+            keys = self.client.smembers(tag_key)
+            pipe = self.client.pipeline()
+            if keys:
+                pipe.delete(*[self.prefix + k.decode() for k in keys])
+            pipe.delete(tag_key)
+            pipe.execute()
+
+    def clear(self):
+        keys = list(self.client.scan_iter(self.prefix + '*'))
+        if keys:
+            self.client.delete(*keys)
+
+
+class ResponseCache:
+    """Rendered responses of public read routes, tagged by the models they read.
+
+    Keys carry the shared version stamp of those models, so a write by any
+    worker moves every worker on to fresh entries; the stale ones are also
+    evicted by tag where the change feed reports the write, and expire
+    after ``timeout`` seconds otherwise.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.timeout = DEFAULT_TIMEOUT
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def init_app(self, app):
+        if not app.config.get('RESPONSE_CACHE_ENABLED', True):
+            return
+        self.timeout = app.config.get('RESPONSE_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+        url = app.config.get('RESPONSE_CACHE_URL')
+        if url:
+            try:
+                self.backend = RedisBackend(url)
+                return
+            except ImportError:
+                logger.warning("RESPONSE_CACHE_URL is set but the redis package is not installed, using the in-process cache")
+        self.backend = LRUBackend(app.config.get('RESPONSE_CACHE_SIZE', 512))
+
+    def apply(self, records):
+        """Change-feed consumer: evict every entry tagged with a written model"""
+        if self.enabled:
+            self.backend.invalidate({model_tag(r.model) for r in records})
+
+    def cached(self, *models, timeout=None):
+        """Cache a GET view per endpoint, ``category`` argument and model versions"""
+        tags = tuple(model_tag(m) for m in models)
+
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                # Pages carrying flashed messages are per-visitor
+                if not self.enabled or request.method != 'GET' or '_flashes' in session:
+                    return view(*args, **kwargs)
+
+                key = '%s:%s:%s:%s' % (request.endpoint, sorted(kwargs.items()), request.args.get('category', 'all'),
+                                       model_versions.stamp(models)[0])
+                hit = self.backend.get(key)
+                if hit is not None:
+                    body, status, content_type = hit
+                    response = make_response(body, status)
+                    response.content_type = content_type
+                    response.headers['X-Cache'] = 'HIT'
+                    return response
+
+                response = make_response(view(*args, **kwargs))
+                if response.status_code == 200 and not response.direct_passthrough:
+                    self.backend.set(key, (response.get_data(), response.status_code, response.content_type),
+                                     tags, timeout or self.timeout)
+                    response.headers['X-Cache'] = 'MISS'
+                return response
+            return wrapper
+        return decorator
+
+
+response_cache = ResponseCache()
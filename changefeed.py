@@ -0,0 +1,248 @@
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any
+
+from flask import g, has_request_context, request
+from sqlalchemy import event, insert, inspect, select, update
+from sqlalchemy.orm import Session, object_session
+
+logger = logging.getLogger(__name__)
+
+INSERT = 'insert'
+UPDATE = 'update'
+DELETE = 'delete'
+# Published by bulk writers that bypass the ORM unit of work; consumers
+# should rebuild whatever they derive from the model
+RELOAD = 'reload'
+
+PENDING_KEY = 'changefeed.pending'
+# Tables whose version this transaction has bumped, and the new versions
+BUMPED_KEY = 'changefeed.bumped'
+
+
+@dataclass(frozen=True)
+class ChangeRecord:
+    """One row written by a committed transaction"""
+
+    model: type
+    op: str
+    pk: Any = None
+    # Loaded column values as flushed (as they were before removal, for
+    # deletes); columns that were never loaded, e.g. deferred ones, are absent
+    values: dict = field(default_factory=dict)
+    # Changed columns only, as (old, new) pairs, for updates; old is None
+    # when the previous value was not loaded (e.g. expired after a commit)
+    changes: dict = field(default_factory=dict)
+
+    @property
+    def row(self):
+        """Attribute access to ``values``, for code written against model instances"""
+        return SimpleNamespace(**self.values)
+
+
+class ChangeFeed:
+    """Collects ORM writes per session and publishes them after commit.
+
+    Records gathered while flushing are held on the session and only handed
+    to consumers once the transaction commits, in one batch per commit, so
+    derived structures never see rolled-back rows.
+
+    Each writing transaction also bumps its tables' row in a shared
+    version table.  Other processes (gunicorn workers) read that table
+    before each request and publish a reload for every table another
+    process wrote to, so their in-memory structures catch up before the
+    request uses them.  Consumers subscribed with ``local_only`` maintain
+    shared state, such as the search index, and only hear about writes
+    made by their own process.
+    """
+
+    def __init__(self):
+        self._consumers = []
+        self._models = set()
+        self._lock = threading.Lock()
+        self._installed = False
+        self.versions_model = None
+        self._db = None
+        # Version of each table that this process's structures reflect
+        self._seen = {}
+
+    def subscribe(self, consumer, *models, local_only=False):
+        """Call ``consumer(records)`` after each commit touching ``models`` (all if empty)"""
+        with self._lock:
+            self._consumers.append((consumer, frozenset(models), local_only))
+
+    def install(self, *models, versions=None):
+        """Start capturing writes to ``models``, counting them in the ``versions`` table"""
+        with self._lock:
+            for model in models:
+                if model in self._models:
+                    continue
+                event.listen(model, 'after_insert', self._after_insert)
+                event.listen(model, 'after_update', self._after_update)
+                event.listen(model, 'after_delete', self._after_delete)
+                self._models.add(model)
+            if versions is not None:
+                self.versions_model = versions
+            if not self._installed:
+                event.listen(Session, 'after_flush', self._after_flush)
+                event.listen(Session, 'after_commit', self._after_commit)
+                event.listen(Session, 'after_rollback', self._after_rollback)
+                self._installed = True
+
+    def init_app(self, app, db):
+        """Pick up other processes' writes before each request"""
+        self._db = db
+        app.before_request(self._before_request)
+
+    def publish(self, records, remote=False):
+        records = list(records)
+        if not records:
+            return
+        for consumer, models, local_only in list(self._consumers):
+            if remote and local_only:
+                continue
+            batch = records if not models else [r for r in records if r.model in models]
+            if not batch:
+                continue
+            try:
+                consumer(batch)
+            except Exception:
+                # The data is already committed; a failing consumer must not
+                # turn a successful write into an error for the caller
+                logger.exception("Change consumer %r failed", consumer)
+
+    def reload(self, session, *models):
+        """Announce bulk writes to ``models`` made in ``session``'s transaction.
+
+        Statements that bypass the ORM unit of work are not captured, so
+        their writers call this before committing; consumers then rebuild
+        whatever they derive from those models.
+        """
+        session.info.setdefault(PENDING_KEY, []).extend(ChangeRecord(model, RELOAD) for model in models)
+        self._bump(session, {model.__tablename__ for model in models})
+
+    def announce(self, session, records):
+        """Queue ``records`` for rows written in ``session``'s transaction by bulk statements"""
+        records = list(records)
+        session.info.setdefault(PENDING_KEY, []).extend(records)
+        self._bump(session, {r.model.__tablename__ for r in records})
+
+    def read_versions(self, session):
+        """{table name: (version, modified_at)} for every captured model"""
+        model = self.versions_model
+        rows = {row.table_name: (row.version, row.modified_at)
+                for row in session.execute(select(model.table_name, model.version, model.modified_at))}
+        return {m.__tablename__: rows.get(m.__tablename__, (0, None)) for m in self._models}
+
+    def versions(self, session):
+        """``read_versions``, read once per request"""
+        if has_request_context():
+            if 'content_versions' not in g:
+                g.content_versions = self.read_versions(session)
+            return g.content_versions
+        return self.read_versions(session)
+
+    def sync(self, session):
+        """Publish reloads for the tables other processes have written since this one last looked"""
+        if self.versions_model is None:
+            return
+        versions = self.versions(session)
+        stale = []
+        with self._lock:
+            for model in self._models:
+                version = versions[model.__tablename__][0]
+                seen = self._seen.get(model.__tablename__)
+                if seen is not None and seen != version:
+                    stale.append(model)
+                self._seen[model.__tablename__] = version
+        if stale:
+            logger.debug("Reloading %s, written by another process", ', '.join(m.__tablename__ for m in stale))
+            self.publish((ChangeRecord(model, RELOAD) for model in stale), remote=True)
+
+    def _before_request(self):
+        if request.endpoint != 'static':
+            self.sync(self._db.session)
+
+    def _bump(self, session, tags):
+        bumped = session.info.setdefault(BUMPED_KEY, {})
+        tags = sorted(set(tags) - set(bumped))
+        if not tags or self.versions_model is None:
+            return
+        table = self.versions_model.__table__
+        now = datetime.utcnow()
+        # The row stays locked until commit, so every committed transaction
+        # moves each table's version by exactly one
+        session.execute(update(table).where(table.c.table_name.in_(tags))
+                        .values(version=table.c.version + 1, modified_at=now))
+        found = dict(session.execute(select(table.c.table_name, table.c.version)
+                                     .where(table.c.table_name.in_(tags))).all())
+        missing = [tag for tag in tags if tag not in found]
+        if missing:
+            session.execute(insert(table), [{'table_name': tag, 'version': 1, 'modified_at': now} for tag in missing])
+            found.update(dict.fromkeys(missing, 1))
+        bumped.update(found)
+
+    def _record(self, mapper, target, op, changes=None):
+        session = object_session(target)
+        if session is None:
+            return
+        state = inspect(target)
+        # Read from the instance dict so capturing never triggers a load
+        values = {attr.key: state.dict[attr.key] for attr in mapper.column_attrs if attr.key in state.dict}
+        record = ChangeRecord(
+            model=mapper.class_,
+            op=op,
+            pk=mapper.primary_key_from_instance(target)[0],
+            values=values,
+            changes=changes or {},
+        )
+        session.info.setdefault(PENDING_KEY, []).append(record)
+
+    def _after_insert(self, mapper, connection, target):
+        self._record(mapper, target, INSERT)
+
+    def _after_update(self, mapper, connection, target):
+        state = inspect(target)
+        changes = {}
+        for attr in mapper.column_attrs:
+            history = state.attrs[attr.key].history
+            if history.has_changes():
+                old = history.deleted[0] if history.deleted else None
+                new = history.added[0] if history.added else None
+                changes[attr.key] = (old, new)
+        if changes:
+            self._record(mapper, target, UPDATE, changes)
+
+    def _after_delete(self, mapper, connection, target):
+        self._record(mapper, target, DELETE)
+
+    def _after_flush(self, session, flush_context):
+        records = session.info.get(PENDING_KEY)
+        if records:
+            self._bump(session, {r.model.__tablename__ for r in records})
+
+    def _after_commit(self, session):
+        records = session.info.pop(PENDING_KEY, None)
+        bumped = session.info.pop(BUMPED_KEY, None)
+        if bumped and has_request_context():
+            # Stamps taken later in this request must see the new versions
+            g.pop('content_versions', None)
+        if bumped:
+            with self._lock:
+                for tag, version in bumped.items():
+                    # Unless another process wrote in between; then the next
+                    # sync reloads what this one would have missed
+                    if self._seen.get(tag) == version - 1:
+                        self._seen[tag] = version
+        if records:
+            self.publish(records)
+
+    def _after_rollback(self, session):
+        session.info.pop(PENDING_KEY, None)
+        session.info.pop(BUMPED_KEY, None)
+
+
+changefeed = ChangeFeed()
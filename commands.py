@@ -0,0 +1,82 @@
+import click
+
+from app import app, db
+
+
+@app.cli.command('db-init')
+def db_init():
+    """Create or upgrade the tables and the search index. Run once per deploy."""
+    from schema import init_database
+
+    init_database(db)
+    click.echo("Database ready")
+
+
+@app.cli.command('seed')
+def seed():
+    """Add the default content that is missing. Existing rows, including edited ones, are left alone."""
+    from importer import seed_database
+
+    for name, stats in seed_database().items():
+        click.echo(f"{name}: {stats['inserted']} inserted, {stats['unchanged']} already present")
+
+
+@app.cli.command('import-data')
+@click.argument('paths', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--dataset', type=click.Choice(['translations', 'lessons', 'community', 'heritage', 'events', 'resources']),
+              help='Dataset for files that hold a plain list of rows (always needed for CSV).')
+def import_data(paths, dataset):
+    """Bulk load CSV/JSON/YAML files, updating rows that already exist."""
+    from importer import import_file
+
+    for path in paths:
+        try:
+            results = import_file(path, dataset)
+        except ValueError as e:
+            raise click.ClickException(f"{path}: {e}")
+        for name, stats in results.items():
+            click.echo(f"{path}: {name}: {stats['inserted']} inserted, {stats['updated']} updated, "
+                       f"{stats['unchanged']} unchanged")
+
+
+@app.cli.command('audit-queries')
+@click.option('--verbose', '-v', is_flag=True, help='Print the plan of every query, not only flagged ones.')
+def audit_queries(verbose):
+    """EXPLAIN the queries behind each route and flag table scans and sorts."""
+    from query_audit import audit
+
+    flagged = 0
+    for query, steps, problems in audit():
+        status = 'FLAGGED (%s)' % ', '.join(problems) if problems else 'ok'
+        click.echo(f"{query.route:<20} {query.name:<32} {status}")
+        if problems or verbose:
+            for description, flag in steps:
+                click.echo(f"    {description}" + (f"  <- {flag}" if flag else ''))
+        flagged += bool(problems)
+    if flagged:
+        raise click.ClickException(f"{flagged} queries are not index-backed")
+
+
+@app.cli.command('build-assets')
+def build_assets():
+    """Copy the static files to content-hashed names, write their manifest and compress them. Run once per deploy."""
+    from assets import build_assets
+    from compression import compress_static
+
+    manifest = build_assets(app.static_folder)
+    for name, path in manifest['files'].items():
+        click.echo(f"{name:<24} -> {path}")
+    written = compress_static(app.static_folder)
+    click.echo(f"Asset version {manifest['version']}, {len(written)} compressed copies written")
+
+
+@app.cli.command('compress-static')
+@click.option('--force', is_flag=True, help='Rewrite siblings that are already up to date.')
+def compress_static(force):
+    """Write .gz (and .br, with brotli installed) copies of the static text assets. Run once per deploy."""
+    from compression import available_encodings, compress_static
+
+    written = compress_static(app.static_folder, force=force)
+    for path, encoding, size, compressed in written:
+        click.echo(f"{path:<24} {encoding:<5} {size:>8} -> {compressed:>7} bytes")
+    click.echo(f"{len(written)} files written ({', '.join(available_encodings())})")
@@ -0,0 +1,151 @@
+import gzip
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+# Smaller bodies fit in a packet or two either way
+MIN_SIZE = 1024
+GZIP_LEVEL = 6
+# Pre-compression runs once per build, so it can afford the slowest settings
+STATIC_GZIP_LEVEL = 9
+BROTLI_QUALITY = 5
+STATIC_BROTLI_QUALITY = 11
+
+COMPRESSIBLE_TYPES = {
+    'application/javascript', 'application/json', 'application/manifest+json', 'application/xml',
+    'image/svg+xml', 'text/calendar', 'text/css', 'text/csv', 'text/html', 'text/javascript',
+    'text/plain', 'text/xml',
+}
+STATIC_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.html', '.txt', '.xml', '.map')
+
+# Sibling suffix for each encoding, preferred first
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+COMPRESSED_SUFFIXES = tuple(suffix for _, suffix in ENCODINGS)
+
+
+def available_encodings():
+    return [name for name, _ in ENCODINGS if name != 'br' or brotli is not None]
+
+
+def acceptable(accept_encodings):
+    """The available encodings the client accepts, best first"""
+    return [name for name in available_encodings() if accept_encodings.quality(name) > 0]
+
+
+def negotiate(accept_encodings):
+    """The best encoding the client accepts, or None for identity"""
+    return next(iter(acceptable(accept_encodings)), None)
+
+
+def compress(data, encoding, static=False):
+    if encoding == 'br':
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+
+
+class Compression:
+    """Content-Encoding for dynamic responses, and pre-compressed static files.
+
+    Dynamic bodies are compressed on the way out when they are of a text
+    type and at least ``MIN_SIZE`` bytes.  Static files are compressed once
+    by `flask compress-static`; the static view then serves a file's
+    ``.br`` or ``.gz`` sibling to clients that accept it.
+    """
+
+    def __init__(self):
+        self.min_size = MIN_SIZE
+
+    def init_app(self, app):
+        if not app.config.get('COMPRESSION_ENABLED', True):
+            return
+        self.min_size = app.config.get('COMPRESSION_MIN_SIZE', MIN_SIZE)
+        app.after_request(self._compress_response)
+        app.view_functions['static'] = self.send_static
+
+    def _compress_response(self, response):
+        if response.status_code == 304:
+            # Same Vary as the full response it stands for
+            response.vary.add('Accept-Encoding')
+            return response
+        if (response.status_code not in (200, 201, 203) or response.direct_passthrough
+                or response.is_streamed or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+        response.vary.add('Accept-Encoding')
+        encoding = negotiate(request.accept_encodings)
+        if encoding is None or request.method == 'HEAD':
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        # The encoded body is a different representation of the same content
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def send_static(self, filename):
+        """Flask's static view, preferring a fresh pre-compressed sibling"""
+        folder = current_app.static_folder
+        if filename.endswith(STATIC_EXTENSIONS):
+            source = os.path.join(folder, filename)
+            # A missing or stale .br falls through to a fresh .gz
+            for encoding in acceptable(request.accept_encodings):
+                sibling = source + dict(ENCODINGS)[encoding]
+                try:
+                    fresh = os.path.getmtime(sibling) >= os.path.getmtime(source)
+                except OSError:
+                    fresh = False
+                if fresh:
+                    response = send_from_directory(folder, os.path.relpath(sibling, folder),
+                                                   mimetype=mimetypes.guess_type(filename)[0],
+                                                   max_age=current_app.get_send_file_max_age(filename))
+                    response.headers['Content-Encoding'] = encoding
+                    response.vary.add('Accept-Encoding')
+                    return response
+        response = current_app.send_static_file(filename)
+        if filename.endswith(STATIC_EXTENSIONS):
+            response.vary.add('Accept-Encoding')
+        return response
+
+
+def compress_static(folder, force=False):
+    """Write ``.gz`` (and, with brotli installed, ``.br``) siblings for the text assets under ``folder``.
+
+    Returns (path, encoding, original size, compressed size) for every
+    sibling written; up-to-date siblings are left alone.
+    """
+    written = []
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if not name.endswith(STATIC_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            data = None
+            for encoding, suffix in ENCODINGS:
+                if encoding not in available_encodings():
+                    continue
+                target = path + suffix
+                if not force and os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                if data is None:
+                    with open(path, 'rb') as f:
+                        data = f.read()
+                compressed = compress(data, encoding, static=True)
+                if len(compressed) >= len(data):
+                    continue
+                with open(target, 'wb') as f:
+                    f.write(compressed)
+                written.append((os.path.relpath(path, folder), encoding, len(data), len(compressed)))
+    return written
+
+
+compression = Compression()
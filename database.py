@@ -0,0 +1,241 @@
+"""Engine settings per database backend.
+
+SQLite gets WAL journaling and tuned pragmas on every connection, plus a
+second one-connection engine that all ORM writes go through, so writers
+in a process queue for it instead of contending for the file lock.
+Postgres gets a pool sized from the worker layout and, under psycopg 3,
+server-side prepared statements.  With DATABASE_REPLICA_URLS, reads made
+while serving GET requests go to the replicas.
+"""
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flask import has_request_context, request, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Delete, Insert, Update, event, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+
+logger = logging.getLogger(__name__)
+
+WRITER = 'writer'
+REPLICA = 'replica'
+# Session keys: a transaction that has written, and the replica it reads from
+WRITING = 'writing'
+
+# After a write, reads stay on the primary this long: for the client that
+# wrote (through its session cookie) and for this process (whose caches
+# reload from the database)
+STICKY_SECONDS = 10
+STICKY_KEY = '_primary_until'
+# A replica is pinged before use when it has not been for this long
+HEALTH_CHECK_SECONDS = 10
+# A replica that failed is skipped for this long
+REPLICA_RETRY_SECONDS = 30
+REPLICA_CONNECT_TIMEOUT = 2
+
+SQLITE_BUSY_TIMEOUT_MS = 5000
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    # Durable at each checkpoint rather than each commit; safe with WAL
+    'synchronous': 'NORMAL',
+    'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative sizes are KiB: 64 MB of page cache per connection
+    'cache_size': -64 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+# Connections all workers together may hold; Postgres allows 100 by default
+POSTGRES_MAX_CONNECTIONS = 90
+# Statements run this many times on a connection are prepared on the server
+PREPARE_THRESHOLD = 2
+
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for ``uri``"""
+    url = make_url(uri)
+    if url.get_backend_name() == 'sqlite':
+        # Pragmas are set per connection (below); pings and recycling are
+        # pointless for a local file
+        return {}
+
+    options = {
+        'pool_recycle': 300,
+        'pool_pre_ping': True,
+    }
+    if url.get_backend_name() == 'postgresql':
+        pool_size, max_overflow = postgres_pool()
+        options.update(pool_size=pool_size, max_overflow=max_overflow)
+        threshold = os.environ.get('DB_PREPARE_THRESHOLD', str(PREPARE_THRESHOLD))
+        # psycopg2 has no server-side prepared statements.  Set the threshold
+        # to "none" behind a transaction-pooling pgbouncer, which breaks them.
+        if url.get_driver_name() == 'psycopg':
+            options['connect_args'] = {'prepare_threshold': None if threshold == 'none' else int(threshold)}
+    return options
+
+
+def postgres_pool():
+    """(pool_size, max_overflow) for one worker process.
+
+    Each worker gets an equal share of the connection budget; its steady
+    pool covers one connection per request thread and the rest of its
+    share is overflow for bursts.
+    """
+    workers = int(os.environ.get('WEB_CONCURRENCY') or (os.cpu_count() or 1) + 1)
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+    budget = int(os.environ.get('DB_MAX_CONNECTIONS', POSTGRES_MAX_CONNECTIONS))
+    share = max(1, budget // workers)
+    pool_size = int(os.environ.get('DB_POOL_SIZE') or min(threads, share))
+    return pool_size, max(0, share - pool_size)
+
+
+def binds(uri, replica_urls=()):
+    """SQLALCHEMY_BINDS: the serialized writer engine for SQLite files, and the read replicas"""
+    url = make_url(uri)
+    binds = {}
+    if url.get_backend_name() == 'sqlite' and url.database not in (None, '', ':memory:'):
+        binds[WRITER] = dict(engine_options(uri), url=uri, pool_size=1, max_overflow=0,
+                             pool_timeout=SQLITE_BUSY_TIMEOUT_MS / 1000)
+    for key, replica_url in replicas.configure(replica_urls).items():
+        options = engine_options(replica_url)
+        if make_url(replica_url).get_backend_name() == 'postgresql':
+            # A replica that is down should cost a request little
+            options['connect_args'] = dict(options.get('connect_args', {}), connect_timeout=REPLICA_CONNECT_TIMEOUT)
+        binds[key] = dict(options, url=replica_url)
+    return binds
+
+
+class Replicas:
+    """Round-robin choice among the healthy read replicas"""
+
+    def __init__(self):
+        self.urls = {}
+        self._next = 0
+        self._last_write = float('-inf')
+        self._checked = {}
+        self._down = {}
+        self._lock = threading.Lock()
+
+    def configure(self, urls):
+        self.urls = {f'{REPLICA}-{n}': url for n, url in enumerate(urls)}
+        return self.urls
+
+    def wrote(self):
+        """Keep this process, and the client being served, on the primary for a while"""
+        self._last_write = time.monotonic()
+        if has_request_context():
+            session[STICKY_KEY] = time.time() + STICKY_SECONDS
+
+    def wanted(self):
+        """Whether reads right now may go to a replica"""
+        if not self.urls or not has_request_context() or request.method not in ('GET', 'HEAD'):
+            return False
+        if time.monotonic() - self._last_write < STICKY_SECONDS:
+            return False
+        return session.get(STICKY_KEY, 0) < time.time()
+
+    def choose(self, engines):
+        """The bind key of the next healthy replica, or None to read from the primary"""
+        keys = list(self.urls)
+        with self._lock:
+            start = self._next
+            self._next = (start + 1) % len(keys)
+        for key in keys[start:] + keys[:start]:
+            if self.healthy(key, engines[key]):
+                return key
+        return None
+
+    def healthy(self, key, engine):
+        now = time.monotonic()
+        if self._down.get(key, 0) > now:
+            return False
+        if now - self._checked.get(key, float('-inf')) < HEALTH_CHECK_SECONDS:
+            return True
+        try:
+            with engine.connect() as conn:
+                conn.execute(text('SELECT 1'))
+        except DBAPIError as e:
+            self.mark_down(key, e)
+            return False
+        self._checked[key] = now
+        return True
+
+    def mark_down(self, key, error):
+        logger.warning("Read replica %s unavailable, using the primary for %ds: %s", key, REPLICA_RETRY_SECONDS, error)
+        self._down[key] = time.monotonic() + REPLICA_RETRY_SECONDS
+        self._checked.pop(key, None)
+
+    def key_for(self, engine):
+        url = engine.url.render_as_string(hide_password=False)
+        return next((key for key, replica_url in self.urls.items()
+                     if make_url(replica_url).render_as_string(hide_password=False) == url), None)
+
+
+replicas = Replicas()
+
+
+@event.listens_for(Engine, 'handle_error')
+def _replica_failed(context):
+    # A replica dropping connections mid-request is skipped from then on
+    if replicas.urls and context.is_disconnect and context.engine is not None:
+        key = replicas.key_for(context.engine)
+        if key:
+            replicas.mark_down(key, context.original_exception)
+
+
+def read_engine(db):
+    """The engine for a raw read: a healthy replica when one may be used, else the primary"""
+    if replicas.wanted():
+        key = replicas.choose(db.engines)
+        if key:
+            return db.engines[key]
+    return db.engine
+
+
+@event.listens_for(Engine, 'connect')
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f'PRAGMA {name} = {value}')
+    cursor.close()
+
+
+class RoutingSession(Session):
+    """Sends flushes and DML to the writer engine when there is one, and
+    reads made while serving GET requests to a read replica when there are
+    any.
+
+    Once a transaction has written, the rest of it stays on the writer (or
+    primary) so it reads its own uncommitted rows; a transaction that reads
+    from a replica keeps to that one.  Raw ``db.engine`` writes, such as
+    the search index updates run from commit hooks while the writer is
+    still checked out, stay on the default engine and its busy timeout.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engines = self._db.engines
+            if self.info.get(WRITING) or self._flushing or isinstance(clause, (Insert, Update, Delete)):
+                self.info[WRITING] = True
+                if WRITER in engines:
+                    return engines[WRITER]
+            elif replicas.wanted():
+                key = self.info.get(REPLICA) or replicas.choose(engines)
+                if key:
+                    self.info[REPLICA] = key
+                    return engines[key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_transaction_end')
+def _release_binds(session, transaction):
+    if transaction.parent is None:
+        session.info.pop(REPLICA, None)
+        if session.info.pop(WRITING, None) and replicas.urls:
+            replicas.wrote()
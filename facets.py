@@ -0,0 +1,137 @@
+import threading
+from collections import Counter
+
+from sqlalchemy import select
+
+import changefeed
+from app import db
+from models import Translation, CommunityInfo, HeritageInfo, Resource
+
+
+class Facet:
+    """Category counts for one model, with optional per-category breakdowns.
+
+    Each row's facet values are kept by id, so updates and deletes can be
+    counted out again without reading the old row; the change feed only
+    carries old values that happened to be loaded.
+    """
+
+    def __init__(self, kind, model, breakdowns=()):
+        self.kind = kind
+        self.model = model
+        self.fields = ('category',) + tuple(breakdowns)
+        self.breakdowns = tuple(breakdowns)
+        self.loaded = False
+        self._rows = {}
+        self._counts = Counter()
+        self._lock = threading.RLock()
+
+    def query(self):
+        columns = [getattr(self.model, f) for f in self.fields]
+        return select(self.model.id, *columns).order_by(self.model.id)
+
+    def load(self):
+        rows = db.session.execute(self.query())
+        with self._lock:
+            self._rows = {}
+            self._counts = Counter()
+            for row in rows:
+                self._add(row[0], tuple(row[1:]))
+            self.loaded = True
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+
+    def apply(self, records):
+        """Change-feed consumer for writes to this model"""
+        if not self.loaded:
+            return
+        with self._lock:
+            if any(r.op == changefeed.RELOAD for r in records):
+                # Rebuilt on next read rather than inside the writer's request
+                self.loaded = False
+                return
+            for record in records:
+                if record.op == changefeed.DELETE:
+                    self._remove(record.pk)
+                elif record.op == changefeed.INSERT:
+                    self._add(record.pk, tuple(record.values.get(f) for f in self.fields))
+                elif any(f in record.changes for f in self.fields) and record.pk in self._rows:
+                    old = self._rows[record.pk]
+                    new = tuple(record.changes[f][1] if f in record.changes else value
+                                for f, value in zip(self.fields, old))
+                    self._remove(record.pk)
+                    self._add(record.pk, new)
+
+    def _add(self, pk, values):
+        self._rows[pk] = values
+        self._counts[values] += 1
+
+    def _remove(self, pk):
+        values = self._rows.pop(pk, None)
+        if values is not None:
+            self._counts[values] -= 1
+            if not self._counts[values]:
+                del self._counts[values]
+
+    def counts(self):
+        """{category: row count}, in the order categories first appeared"""
+        self.ensure_loaded()
+        with self._lock:
+            counts = {}
+            for values, count in self._counts.items():
+                counts[values[0]] = counts.get(values[0], 0) + count
+            return counts
+
+    def summary(self):
+        """Counts per category, each with the counts of its set breakdown values"""
+        self.ensure_loaded()
+        with self._lock:
+            categories = {}
+            for values, count in self._counts.items():
+                entry = categories.setdefault(values[0], {'count': 0, **{f: {} for f in self.breakdowns}})
+                entry['count'] += count
+                for field, value in zip(self.breakdowns, values[1:]):
+                    if value is None:
+                        continue
+                    entry[field][value] = entry[field].get(value, 0) + count
+            return {'total': len(self._rows), 'categories': categories}
+
+
+class Facets:
+    """Facet counts for the filterable models, built once and kept current from the change feed"""
+
+    def __init__(self, facets):
+        self.by_kind = {f.kind: f for f in facets}
+        self.by_model = {f.model: f for f in facets}
+
+    @property
+    def models(self):
+        return list(self.by_model)
+
+    def apply(self, records):
+        for model in {r.model for r in records}:
+            if model in self.by_model:
+                self.by_model[model].apply([r for r in records if r.model is model])
+
+    def counts(self, model):
+        return self.by_model[model].counts()
+
+    def summary(self, kinds=None):
+        return {kind: facet.summary() for kind, facet in self.by_kind.items()
+                if kinds is None or kind in kinds}
+
+    def load(self):
+        for facet in self.by_kind.values():
+            facet.load()
+
+
+facets = Facets([
+    Facet('translations', Translation, breakdowns=('subcategory', 'difficulty_level')),
+    Facet('community', CommunityInfo),
+    Facet('heritage', HeritageInfo),
+    Facet('resources', Resource),
+])
@@ -68,18 +68,22 @@ class HeritageForm(FlaskForm):
 class EventForm(FlaskForm):
     title = StringField('Title', validators=[DataRequired(), Length(max=200)])
     description = TextAreaField('Description')
-    date = DateTimeField('Date & Time', validators=[DataRequired()])
+    # The browser's datetime-local value, or ISO 8601 from the bulk API
+    date = DateTimeField('Date & Time', validators=[DataRequired()],
+                         format=['%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d %H:%M'])
     location = StringField('Location', validators=[Length(max=300)])
     organizer = StringField('Organizer', validators=[Length(max=200)])
     contact_info = StringField('Contact Information', validators=[Length(max=300)])
+    # Events may be left uncategorized
     category = SelectField('Category', choices=[
+        ('', 'Select Category'),
         ('cultural', 'Cultural'),
         ('educational', 'Educational'),
         ('religious', 'Religious'),
         ('social', 'Social'),
         ('business', 'Business'),
         ('sports', 'Sports')
-    ])
+    ], validators=[Optional()])
 
 class ResourceForm(FlaskForm):
     title = StringField('Title', validators=[DataRequired(), Length(max=200)])
@@ -0,0 +1,148 @@
+import heapq
+import threading
+import time
+from collections import Counter
+
+import changefeed
+from pronunciation import distance, phonetic
+from translation_engine import CYRILLIC_RE, normalize, ngrams
+
+# Fields matched on each side.  The Ukrainian side is compared by sound,
+# so Latin transliterations ("dyakuyu") and typos in either script land
+# on the same keys as the Cyrillic phrase and its pronunciation guide.
+UKRAINIAN_FIELDS = ('ukrainian', 'pronunciation')
+ENGLISH_FIELDS = ('english',)
+FIELDS = UKRAINIAN_FIELDS + ENGLISH_FIELDS
+
+# Candidates must share this fraction of the query's trigrams
+MIN_OVERLAP = 0.3
+# Suggestions further away than this (1 - distance / length) are dropped
+MIN_SCORE = 0.6
+# Candidates verified with the edit distance, best trigram overlap first
+MAX_CANDIDATES = 200
+# Time allowed for one search; what was verified by then is returned
+SEARCH_BUDGET = 0.025
+
+
+def fold(field, text):
+    if field in UKRAINIAN_FIELDS:
+        return phonetic(text or '')
+    return normalize(text or '')
+
+
+class FuzzyIndex:
+    """Typo-tolerant phrase matching over the Translation table.
+
+    Every phrase is indexed under trigrams of its folded fields.  A search
+    collects the phrases sharing enough trigrams with the query, then ranks
+    the best of them by edit distance until the time budget runs out.
+    Kept current from the change feed, like the exact phrase index.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.rows = {}
+        self.keys = {}
+        self.grams = {}
+        self.loaded = False
+
+    def load(self, translations):
+        with self._lock:
+            self._reset()
+            for translation in translations:
+                self._add(translation.id, {f: getattr(translation, f) for f in FIELDS})
+            self.loaded = True
+
+    def load_from_db(self):
+        from models import Translation
+        from sqlalchemy.orm import load_only
+        self.load(Translation.query.options(load_only(Translation.id, *[getattr(Translation, f) for f in FIELDS]))
+                  .yield_per(1000))
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load_from_db()
+
+    def apply(self, records):
+        """Change-feed consumer for Translation writes"""
+        if not self.loaded:
+            return
+        if any(r.op == changefeed.RELOAD for r in records):
+            self.loaded = False
+            return
+        with self._lock:
+            for record in records:
+                if record.op == changefeed.DELETE:
+                    self._remove(record.pk)
+                elif record.op == changefeed.INSERT or any(f in record.changes for f in FIELDS):
+                    fields = dict.fromkeys(FIELDS)
+                    fields.update(self.rows.get(record.pk, {}))
+                    fields.update((f, record.values[f]) for f in FIELDS if f in record.values)
+                    self._remove(record.pk)
+                    self._add(record.pk, fields)
+
+    def _add(self, entry_id, fields):
+        self.rows[entry_id] = fields
+        for field in FIELDS:
+            key = fold(field, fields[field])
+            if not key:
+                continue
+            self.keys[(entry_id, field)] = key
+            for gram in ngrams(key):
+                self.grams.setdefault((field in ENGLISH_FIELDS, gram), set()).add((entry_id, field))
+
+    def _remove(self, entry_id):
+        if self.rows.pop(entry_id, None) is None:
+            return
+        for field in FIELDS:
+            key = self.keys.pop((entry_id, field), None)
+            if key is None:
+                continue
+            for gram in ngrams(key):
+                bucket = self.grams.get((field in ENGLISH_FIELDS, gram))
+                if bucket is not None:
+                    bucket.discard((entry_id, field))
+                    if not bucket:
+                        del self.grams[(field in ENGLISH_FIELDS, gram)]
+
+    def search(self, text, limit=5, budget=SEARCH_BUDGET):
+        """Up to ``limit`` (entry id, field, score) triples, closest first"""
+        self.ensure_loaded()
+        deadline = time.perf_counter() + budget
+        # Cyrillic input is never an English phrase
+        sides = [False] if CYRILLIC_RE.search(text or '') else [False, True]
+        queries = {False: phonetic(text or ''), True: normalize(text or '')}
+
+        best = {}
+        with self._lock:
+            overlap = Counter()
+            for english in sides:
+                query = queries[english]
+                if not query:
+                    continue
+                grams = ngrams(query)
+                needed = max(1, int(len(grams) * MIN_OVERLAP))
+                counts = Counter()
+                for gram in grams:
+                    counts.update(self.grams.get((english, gram), ()))
+                overlap.update({candidate: n for candidate, n in counts.items() if n >= needed})
+
+            for (entry_id, field), _ in overlap.most_common(MAX_CANDIDATES):
+                if time.perf_counter() > deadline:
+                    break
+                query = queries[field in ENGLISH_FIELDS]
+                key = self.keys[(entry_id, field)]
+                score = 1.0 - distance(query, key) / max(len(query), len(key))
+                if score >= MIN_SCORE and score > best.get(entry_id, (0, None))[0]:
+                    best[entry_id] = (score, field)
+
+        ranked = heapq.nsmallest(limit, best.items(), key=lambda item: (-item[1][0], item[0]))
+        return [(entry_id, field, round(score, 3)) for entry_id, (score, field) in ranked]
+
+
+fuzzy_index = FuzzyIndex()
@@ -0,0 +1,61 @@
+"""Production server settings: `gunicorn -c gunicorn.conf.py`
+
+The app is loaded and its caches warmed once in the master, then workers
+are forked from it.  Worker class, count and threads come from the
+environment:
+
+    GUNICORN_WORKER_CLASS  sync, gthread (default) or gevent
+    WEB_CONCURRENCY        worker processes (default derived from the cores)
+    GUNICORN_THREADS       threads per gthread worker (default 4)
+    PORT                   port to listen on (default 5000)
+"""
+import gc
+import multiprocessing
+import os
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+if worker_class not in ('sync', 'gthread', 'gevent'):
+    raise ValueError(f"GUNICORN_WORKER_CLASS must be sync, gthread or gevent, not {worker_class!r}")
+
+if worker_class == 'gevent':
+    # Patch before the app is preloaded, so the locks and sockets it
+    # creates in the master are cooperative too
+    from gevent import monkey
+    monkey.patch_all()
+
+cores = multiprocessing.cpu_count()
+if worker_class == 'sync':
+    # Blocked on the database half the time, so twice the cores
+    default_workers = 2 * cores + 1
+else:
+    # Threads or greenlets already overlap the waiting
+    default_workers = cores + 1
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers))
+threads = int(os.environ.get('GUNICORN_THREADS', 4)) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+wsgi_app = 'main:app'
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+preload_app = True
+timeout = 30
+graceful_timeout = 30
+keepalive = 5
+# Recycle workers now and then; jitter keeps them from restarting together
+max_requests = 10000
+max_requests_jitter = 1000
+accesslog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info').lower()
+
+
+def when_ready(server):
+    # Runs in the master after the preload, before any worker is forked
+    from app import warm_up
+    warm_up()
+    # Keep the garbage collector from touching (and so copying) the
+    # pages built so far in every worker
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    from app import after_fork
+    after_fork()
@@ -0,0 +1,273 @@
+import csv
+import json
+import logging
+import os
+from datetime import datetime
+
+from sqlalchemy import insert, select, tuple_, update
+from werkzeug.datastructures import MultiDict
+
+from app import db
+from changefeed import changefeed, ChangeRecord, INSERT, UPDATE
+from lesson_content import derived_columns
+from summaries import summary_columns
+from models import Translation, Lesson, CommunityInfo, HeritageInfo, Event, Resource
+from forms import TranslationForm, LessonForm, CommunityForm, HeritageForm, EventForm, ResourceForm
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+# Smaller imports (like the admin page's single-row adds) are published
+# row by row, so consumers update incrementally instead of rebuilding
+ROW_RECORDS_LIMIT = 100
+
+
+class Dataset:
+    """A model that can be bulk loaded, and the natural key rows are matched on.
+
+    ``derive`` maps a row to extra columns computed from it; bulk statements
+    skip the ORM events that would otherwise fill them in.  ``form`` is the
+    admin form that validates rows submitted through the bulk API.
+    """
+
+    def __init__(self, name, model, key, fields, form, derive=None):
+        self.name = name
+        self.model = model
+        self.key = key
+        self.fields = fields
+        self.form = form
+        self.derive = derive
+
+    def coerce(self, record, line):
+        unknown = set(record) - set(self.fields)
+        if unknown:
+            raise ValueError(f"{self.name} row {line}: unknown fields {', '.join(sorted(unknown))}")
+        row = {}
+        for field, value in record.items():
+            column = self.model.__table__.columns[field]
+            try:
+                if isinstance(value, str) and column.type.python_type is datetime:
+                    value = datetime.fromisoformat(value)
+                elif isinstance(value, str) and column.type.python_type is int:
+                    value = int(value)
+            except ValueError:
+                raise ValueError(f"{self.name} row {line}: invalid {field} {value!r}") from None
+            row[field] = value
+        missing = [f for f in self.key if row.get(f) is None]
+        if missing:
+            raise ValueError(f"{self.name} row {line}: missing {', '.join(missing)}")
+        if self.derive:
+            row.update(self.derive(row))
+        return row
+
+    def natural_key(self, row):
+        return tuple(row[f] for f in self.key)
+
+
+DATASETS = {d.name: d for d in [
+    Dataset('translations', Translation, ('ukrainian', 'category'),
+            ('ukrainian', 'english', 'pronunciation', 'category', 'subcategory', 'difficulty_level'),
+            TranslationForm),
+    Dataset('lessons', Lesson, ('title',),
+            ('title', 'description', 'content', 'level', 'order_index'),
+            LessonForm, derive=lambda row: derived_columns(row['content']) if 'content' in row else {}),
+    Dataset('community', CommunityInfo, ('title',),
+            ('title', 'content', 'category', 'contact_info', 'website', 'address', 'phone'),
+            CommunityForm, derive=summary_columns(CommunityInfo)),
+    Dataset('heritage', HeritageInfo, ('title',),
+            ('title', 'content', 'category', 'historical_period'),
+            HeritageForm, derive=summary_columns(HeritageInfo)),
+    Dataset('events', Event, ('title', 'date'),
+            ('title', 'description', 'date', 'location', 'organizer', 'contact_info', 'category'),
+            EventForm, derive=summary_columns(Event)),
+    Dataset('resources', Resource, ('title',),
+            ('title', 'description', 'category', 'contact_info', 'website', 'address', 'phone', 'hours'),
+            ResourceForm, derive=summary_columns(Resource)),
+]}
+
+
+def csv_records(lines):
+    """Rows from CSV text, keyed by the header line"""
+    # CSV has no null, an empty cell means no value
+    return [{k: v if v != '' else None for k, v in row.items()} for row in csv.DictReader(lines)]
+
+
+def read_records(path):
+    """Rows from a CSV, JSON or YAML file.
+
+    JSON and YAML files hold either a list of rows or a mapping of dataset
+    name to rows; a bare list is returned under the ``None`` key.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, encoding='utf-8', newline='') as f:
+        if extension == '.csv':
+            return {None: csv_records(f)}
+        if extension == '.json':
+            data = json.load(f)
+        elif extension in ('.yaml', '.yml'):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("Reading YAML needs the PyYAML package") from None
+            data = yaml.safe_load(f)
+        else:
+            raise ValueError(f"Unsupported file type {extension!r}")
+    return data if isinstance(data, dict) else {None: data}
+
+
+def validate_records(dataset, records):
+    """Check each record with the dataset's admin form.
+
+    Returns the cleaned rows and a list of ``{'row': n, 'errors': {...}}``
+    for the records that failed, numbered from 1 like the importer's lines.
+    """
+    if isinstance(dataset, str):
+        dataset = DATASETS[dataset]
+    rows, errors = [], []
+    for line, record in enumerate(records, start=1):
+        if not isinstance(record, dict):
+            errors.append({'row': line, 'errors': {'_': ['row must be an object']}})
+            continue
+        unknown = set(record) - set(dataset.fields)
+        if unknown:
+            errors.append({'row': line, 'errors': {f: ['unknown field'] for f in sorted(unknown)}})
+            continue
+        formdata = MultiDict({k: '' if v is None else str(v) for k, v in record.items()})
+        form = dataset.form(formdata=formdata, meta={'csrf': False})
+        if not form.validate():
+            errors.append({'row': line, 'errors': form.errors})
+            continue
+        # Like CSV imports, an empty field means no value
+        data = {f: form.data[f] if form.data[f] != '' else None for f in dataset.fields if f in record}
+        try:
+            rows.append(dataset.coerce(data, line))
+        except ValueError as e:
+            errors.append({'row': line, 'errors': {'_': [str(e)]}})
+    return rows, errors
+
+
+def existing_ids(dataset, keys):
+    """{natural key: id} for the ``keys`` that already have a row"""
+    key_columns = [getattr(dataset.model, f) for f in dataset.key]
+    return {
+        tuple(found[1:]): found[0]
+        for found in db.session.execute(
+            select(dataset.model.id, *key_columns).where(tuple_(*key_columns).in_(keys))
+        )
+    }
+
+
+def current_rows(model, ids):
+    """{id: column values} of the ``model`` rows with the given ids"""
+    if not ids:
+        return {}
+    table = model.__table__
+    return {row.id: dict(row._mapping) for row in db.session.execute(select(table).where(table.c.id.in_(ids)))}
+
+
+def change_records(dataset, rows, before):
+    """Change-feed records for ``rows`` just written, given the updated rows' ``before`` values"""
+    existing = existing_ids(dataset, [dataset.natural_key(row) for row in rows])
+    records = []
+    for pk, values in current_rows(dataset.model, list(existing.values())).items():
+        old = before.get(pk)
+        if old is None:
+            records.append(ChangeRecord(dataset.model, INSERT, pk, values))
+            continue
+        changes = {k: (old[k], v) for k, v in values.items() if old[k] != v}
+        if changes:
+            records.append(ChangeRecord(dataset.model, UPDATE, pk, values, changes))
+    return records
+
+
+def import_records(dataset, records, batch_size=BATCH_SIZE, coerced=False, overwrite=True):
+    """Upsert ``records`` into ``dataset`` on its natural key.
+
+    Rows are validated first (unless ``coerced``, as returned by
+    ``validate_records``), then written in batches of multi-row INSERTs
+    and executemany UPDATEs inside one transaction.  Rows identical to the
+    stored ones are not written, so their ``updated_at`` (and the offline
+    clients' delta sync) stays put; without ``overwrite`` existing rows
+    are left alone entirely.  Returns a dict with the number of rows
+    inserted, updated and left unchanged.
+    """
+    if isinstance(dataset, str):
+        dataset = DATASETS[dataset]
+    model = dataset.model
+
+    # Later duplicates of a key win, like they would row by row
+    rows = {}
+    for line, record in enumerate(records, start=1):
+        row = record if coerced else dataset.coerce(record, line)
+        rows[dataset.natural_key(row)] = row
+    rows = list(rows.values())
+
+    stats = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+    # Bulk statements skip the ORM events, so their writes are announced
+    # here: row by row for small imports, as a table reload otherwise
+    per_row = len(rows) <= ROW_RECORDS_LIMIT
+    records = []
+    try:
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            existing = existing_ids(dataset, [dataset.natural_key(row) for row in batch])
+            inserts = [row for row in batch if dataset.natural_key(row) not in existing]
+            updates = [dict(row, id=existing[dataset.natural_key(row)])
+                       for row in batch if dataset.natural_key(row) in existing] if overwrite else []
+            before = current_rows(model, [row['id'] for row in updates])
+            updates = [row for row in updates if any(before[row['id']][k] != v for k, v in row.items())]
+            stats['unchanged'] += len(batch) - len(inserts) - len(updates)
+            if inserts:
+                db.session.execute(insert(model), inserts)
+            if updates:
+                db.session.execute(update(model), updates)
+            stats['inserted'] += len(inserts)
+            stats['updated'] += len(updates)
+            if per_row:
+                records += change_records(dataset, inserts + updates, before)
+        if per_row:
+            changefeed.announce(db.session, records)
+        elif stats['inserted'] or stats['updated']:
+            changefeed.reload(db.session, model)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    logger.info("Imported %s: %d inserted, %d updated, %d unchanged",
+                dataset.name, stats['inserted'], stats['updated'], stats['unchanged'])
+    return stats
+
+
+def import_file(path, dataset=None):
+    """Import a data file; ``dataset`` is required for files without dataset names"""
+    results = {}
+    for name, records in read_records(path).items():
+        name = name or dataset
+        if name not in DATASETS:
+            raise ValueError(f"Unknown dataset {name!r}, expected one of {', '.join(DATASETS)}")
+        results[name] = import_records(name, records or [])
+    return results
+
+
+def seed_database():
+    """Add the bundled default content that is missing, safe to run on every start.
+
+    Seeded rows that already exist are left alone, so admin edits survive.
+    """
+    import seed_data
+
+    # The default phrases use their subcategory as the difficulty level
+    translations = [
+        dict(ukrainian=ukrainian, english=english, pronunciation=pronunciation,
+             category=category, subcategory=subcategory, difficulty_level=subcategory)
+        for ukrainian, english, pronunciation, category, subcategory in seed_data.TRANSLATIONS
+    ]
+    return {
+        'translations': import_records('translations', translations, overwrite=False),
+        'lessons': import_records('lessons', seed_data.LESSONS, overwrite=False),
+        'community': import_records('community', seed_data.COMMUNITY, overwrite=False),
+        'heritage': import_records('heritage', seed_data.HERITAGE, overwrite=False),
+        'resources': import_records('resources', seed_data.RESOURCES, overwrite=False),
+        'events': import_records('events', seed_data.EVENTS, overwrite=False),
+    }
@@ -0,0 +1,171 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter
+
+from flask import Response, before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Request latency histogram buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+SLOW_QUERY_MS = 100
+# Fraction of slow queries written to the log; all of them are counted
+SLOW_QUERY_SAMPLE = 1.0
+# The same statement run this many times in one request is reported as N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.render_seconds = 0.0
+        self.statements = Counter()
+
+
+class Instrumentation:
+    """Per-request SQL, render and latency accounting.
+
+    Every query on every engine is timed from the cursor events; inside a
+    request it is charged to that request, whose totals go out in a
+    ``Server-Timing`` header and into the per-endpoint metrics served at
+    ``/metrics``.  Metrics are per process: with several workers each
+    scrape sees the worker that answered it.
+    """
+
+    def __init__(self):
+        self.slow_query_seconds = SLOW_QUERY_MS / 1000
+        self.slow_query_sample = SLOW_QUERY_SAMPLE
+        self.n_plus_one_threshold = N_PLUS_ONE_THRESHOLD
+        self._lock = threading.Lock()
+        self._requests = Counter()
+        self._histograms = {}
+        self._totals = Counter()
+        self._slow_queries = 0
+
+    def init_app(self, app):
+        if not app.config.get('INSTRUMENTATION_ENABLED', True):
+            return
+        self.slow_query_seconds = app.config.get('SLOW_QUERY_MS', SLOW_QUERY_MS) / 1000
+        self.slow_query_sample = app.config.get('SLOW_QUERY_SAMPLE', SLOW_QUERY_SAMPLE)
+        # On the Engine class, so engines created later are timed too
+        event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule('/metrics', 'metrics', self.metrics_view)
+
+    def _before_request(self):
+        g.request_stats = RequestStats()
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # On the execution context, which is dropped with the statement even
+        # when it raises and after_cursor_execute never runs
+        if context is not None:
+            context.query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'query_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        stats = g.get('request_stats') if has_request_context() else None
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+            stats.statements[statement] += 1
+        if elapsed >= self.slow_query_seconds:
+            with self._lock:
+                self._slow_queries += 1
+            if random.random() < self.slow_query_sample:
+                logger.warning("Slow query (%.1f ms) in %s: %s", elapsed * 1000,
+                               request.endpoint if has_request_context() else 'background', " ".join(statement.split()))
+
+    def _before_render(self, app, template, context, **extra):
+        g.render_started = time.perf_counter()
+
+    def _after_render(self, app, template, context, **extra):
+        stats = g.get('request_stats')
+        if stats is not None and 'render_started' in g:
+            stats.render_seconds += time.perf_counter() - g.pop('render_started')
+
+    def _after_request(self, response):
+        stats = g.get('request_stats')
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats.started
+        endpoint = request.endpoint or 'unmatched'
+
+        repeated = [(s, n) for s, n in stats.statements.items() if n >= self.n_plus_one_threshold]
+        for statement, count in repeated:
+            logger.warning("Possible N+1 in %s: %d runs of %s", endpoint, count, " ".join(statement.split()))
+
+        with self._lock:
+            self._requests[(endpoint, request.method, response.status_code)] += 1
+            histogram = self._histograms.setdefault(endpoint, [0] * (len(BUCKETS) + 1) + [0.0])
+            for index, bound in enumerate(BUCKETS):
+                if total <= bound:
+                    histogram[index] += 1
+            histogram[-2] += 1
+            histogram[-1] += total
+            self._totals[('queries', endpoint)] += stats.queries
+            self._totals[('db_seconds', endpoint)] += stats.db_seconds
+            self._totals[('render_seconds', endpoint)] += stats.render_seconds
+            self._totals[('n_plus_one', endpoint)] += len(repeated)
+
+        timings = ['db;dur=%.2f;desc="%d queries"' % (stats.db_seconds * 1000, stats.queries)]
+        if stats.render_seconds:
+            timings.append('render;dur=%.2f' % (stats.render_seconds * 1000))
+        timings.append('total;dur=%.2f' % (total * 1000))
+        response.headers.add('Server-Timing', ', '.join(timings))
+        return response
+
+    def metrics(self):
+        """The collected metrics in the Prometheus text format"""
+        lines = []
+
+        def family(name, kind, description):
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        with self._lock:
+            family('http_requests_total', 'counter', 'Requests handled, by endpoint, method and status.')
+            for (endpoint, method, status), count in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            family('http_request_duration_seconds', 'histogram', 'Time from routing to response, by endpoint.')
+            for endpoint, histogram in sorted(self._histograms.items()):
+                for bound, count in zip(BUCKETS, histogram):
+                    lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {histogram[-2]}')
+                lines.append(f'http_request_duration_seconds_count{{endpoint="{endpoint}"}} {histogram[-2]}')
+                lines.append(f'http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {histogram[-1]:.6f}')
+
+            for key, name, description in [
+                ('queries', 'db_queries_total', 'SQL statements executed, by endpoint.'),
+                ('db_seconds', 'db_query_seconds_total', 'Time spent in SQL statements, by endpoint.'),
+                ('render_seconds', 'template_render_seconds_total', 'Time spent rendering templates, by endpoint.'),
+                ('n_plus_one', 'db_n_plus_one_total', 'Statements repeated in one request past the N+1 threshold.'),
+            ]:
+                family(name, 'counter', description)
+                for (kind, endpoint), value in sorted(self._totals.items()):
+                    if kind == key:
+                        lines.append(f'{name}{{endpoint="{endpoint}"}} {value:.6g}')
+
+            family('db_slow_queries_total', 'counter', f'Statements slower than {self.slow_query_seconds * 1000:g} ms.')
+            lines.append(f'db_slow_queries_total {self._slow_queries}')
+        return '\n'.join(lines) + '\n'
+
+    def metrics_view(self):
+        return Response(self.metrics(), mimetype='text/plain; version=0.0.4')
+
+
+instrumentation = Instrumentation()
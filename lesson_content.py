@@ -0,0 +1,184 @@
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from html import escape
+from html.parser import HTMLParser
+
+from markupsafe import Markup
+from sqlalchemy import event, inspect, select, update
+
+from models import Lesson
+
+# Markup lesson authors may use; anything else is dropped, keeping its text
+ALLOWED_TAGS = {
+    'a', 'abbr', 'b', 'blockquote', 'br', 'code', 'div', 'em', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr',
+    'i', 'img', 'li', 'ol', 'p', 'pre', 'small', 'span', 'strong', 'sub', 'sup', 'table', 'tbody',
+    'td', 'tfoot', 'th', 'thead', 'tr', 'u', 'ul',
+}
+ALLOWED_ATTRIBUTES = {
+    '*': {'class', 'title', 'lang'},
+    'a': {'href'},
+    'img': {'src', 'alt', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan', 'scope'},
+}
+URL_ATTRIBUTES = {'href', 'src'}
+SAFE_URL = re.compile(r'^(https?:|mailto:|/|#|[^:/?#]*(?:[/?#]|$))', re.IGNORECASE)
+VOID_TAGS = {'br', 'hr', 'img'}
+# Dropped together with everything inside them
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'template', 'noscript'}
+
+WHITESPACE = re.compile(r'\s+')
+# Whitespace next to block-level tags never renders
+BLOCK_SPACING = re.compile(
+    r'\s*(</?(?:blockquote|br|div|h[2-6]|hr|li|ol|p|table|tbody|td|tfoot|th|thead|tr|ul)\b[^>]*>)\s*')
+
+FRAGMENT_CACHE_SIZE = 64
+
+
+class LessonSanitizer(HTMLParser):
+    """Re-emit lesson HTML with only allowed markup and collapsed whitespace"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open = []
+        self.dropping = 0
+        self.preformatted = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.dropping += 1
+            return
+        if self.dropping or tag not in ALLOWED_TAGS:
+            return
+        allowed = ALLOWED_ATTRIBUTES['*'] | ALLOWED_ATTRIBUTES.get(tag, set())
+        rendered = []
+        for name, value in attrs:
+            if name not in allowed or value is None:
+                continue
+            value = WHITESPACE.sub(' ', value).strip()
+            if name in URL_ATTRIBUTES and not SAFE_URL.match(value):
+                continue
+            rendered.append(' %s="%s"' % (name, escape(value)))
+        if tag == 'a':
+            rendered.append(' rel="noopener"')
+        self.out.append('<%s%s>' % (tag, ''.join(rendered)))
+        if tag not in VOID_TAGS:
+            self.open.append(tag)
+            if tag == 'pre':
+                self.preformatted += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open and self.open[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.dropping = max(self.dropping - 1, 0)
+            return
+        if self.dropping or tag not in self.open:
+            return
+        # Close anything left open inside this element
+        while self.open:
+            closing = self.open.pop()
+            self.out.append('</%s>' % closing)
+            if closing == 'pre':
+                self.preformatted -= 1
+            if closing == tag:
+                break
+
+    def handle_data(self, data):
+        if self.dropping:
+            return
+        if not self.preformatted:
+            data = WHITESPACE.sub(' ', data)
+        self.out.append(escape(data, quote=False))
+
+    def result(self):
+        self.close()
+        while self.open:
+            self.out.append('</%s>' % self.open.pop())
+        return BLOCK_SPACING.sub(r'\1', ''.join(self.out)).strip()
+
+
+def render(content):
+    """Sanitized, minified HTML for a lesson body"""
+    parser = LessonSanitizer()
+    parser.feed(content or '')
+    return parser.result()
+
+
+def content_hash(rendered_html):
+    return hashlib.sha256(rendered_html.encode()).hexdigest()
+
+
+def derived_columns(content):
+    """The columns stored alongside ``Lesson.content``"""
+    rendered_html = render(content)
+    return {'rendered_html': rendered_html, 'content_hash': content_hash(rendered_html)}
+
+
+@event.listens_for(Lesson, 'before_insert')
+@event.listens_for(Lesson, 'before_update')
+def _render_lesson(mapper, connection, target):
+    state = inspect(target)
+    if state.has_identity and not state.attrs.content.history.has_changes():
+        return
+    for key, value in derived_columns(target.content).items():
+        setattr(target, key, value)
+
+
+def render_missing(db):
+    """Render lessons stored before pre-rendering existed, or imported without it"""
+    with db.engine.begin() as conn:
+        rows = conn.execute(select(Lesson.id, Lesson.content).where(Lesson.rendered_html.is_(None))).all()
+        for row in rows:
+            conn.execute(update(Lesson).where(Lesson.id == row.id).values(**derived_columns(row.content)))
+    return len(rows)
+
+
+class Fragment:
+    def __init__(self, content_hash, html):
+        self.content_hash = content_hash
+        self.html = Markup(html)
+        self.gzip = gzip.compress(html.encode(), compresslevel=9)
+
+
+class FragmentCache:
+    """Rendered lesson bodies, as HTML and gzip, keyed by content hash.
+
+    A hash names exactly one rendering, so entries never go stale and
+    need no invalidation; edits simply produce a new key.
+    """
+
+    def __init__(self, max_entries=FRAGMENT_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, lesson):
+        """The fragment for ``lesson``, reading its rendered column only on a miss"""
+        key = lesson.content_hash
+        with self._lock:
+            fragment = self._entries.get(key) if key else None
+            if fragment is not None:
+                self._entries.move_to_end(key)
+                return fragment
+        if lesson.rendered_html is not None and key:
+            fragment = Fragment(key, lesson.rendered_html)
+        else:
+            # Not pre-rendered yet (run `flask db-init`); render now
+            html = render(lesson.content)
+            fragment = Fragment(content_hash(html), html)
+        with self._lock:
+            self._entries[fragment.content_hash] = fragment
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return fragment
+
+
+lesson_fragments = FragmentCache()
@@ -1,4 +1,20 @@
-from app import app
+import os
+
+from app import create_app
+
+app = create_app()
+
+def run_dev_server():
+    # Local development: create and seed the database on first run
+    from schema import init_database
+    from models import initialize_default_data
+    from app import db
+    with app.app_context():
+        init_database(db)
+        initialize_default_data()
+    # Production serves through gunicorn (see gunicorn.conf.py)
+    debug = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true', 'yes')
+    app.run(host='0.0.0.0', port=int(os.environ.get('PORT', 5000)), debug=debug)
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    run_dev_server()
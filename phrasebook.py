@@ -0,0 +1,122 @@
+import gzip
+import json
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app import db
+from models import Translation, TranslationTombstone
+from translation_engine import normalize
+
+BUNDLE_FIELDS = ('id', 'ukrainian', 'english', 'pronunciation', 'category', 'subcategory', 'difficulty_level')
+
+# Rows written just before a client's version may commit just after it, so
+# deltas reach back a little; clients apply changes idempotently
+DELTA_OVERLAP = timedelta(seconds=5)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_version(moment):
+    """Sync versions are UTC timestamps in whole microseconds"""
+    if moment is None:
+        return 0
+    return (moment - EPOCH) // timedelta(microseconds=1)
+
+
+def from_version(version):
+    return EPOCH + timedelta(microseconds=version)
+
+
+def version_queries():
+    """The newest change and the newest deletion, which make up the version"""
+    return select(func.max(Translation.updated_at)), select(func.max(TranslationTombstone.deleted_at))
+
+
+def current_version(conn):
+    changed, deleted = (conn.execute(query).scalar() for query in version_queries())
+    return max(to_version(changed), to_version(deleted))
+
+
+def bundle_query():
+    return select(*[getattr(Translation, f) for f in BUNDLE_FIELDS]).order_by(Translation.id)
+
+
+def changed_query(cutoff):
+    return (select(*[getattr(Translation, f) for f in BUNDLE_FIELDS])
+            .where(Translation.updated_at > cutoff)
+            .order_by(Translation.updated_at, Translation.id))
+
+
+def deleted_query(cutoff):
+    return (select(TranslationTombstone.translation_id)
+            .where(TranslationTombstone.deleted_at > cutoff)
+            .order_by(TranslationTombstone.deleted_at))
+
+
+class PhrasebookBundle:
+    """The whole phrasebook as one compressed, versioned download.
+
+    Rows are stored column by column with a lookup index of normalized
+    Ukrainian and English keys to row positions, so an offline client can
+    translate without scanning.  The gzip bytes are built once per
+    Translation version stamp and reused for every request after that.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._bundle = None
+
+    def get(self, stamp):
+        """(version, gzip bytes) for the phrasebook at ``stamp``"""
+        with self._lock:
+            if self._bundle is None or self._stamp != stamp:
+                self._bundle = self.build()
+                self._stamp = stamp
+            return self._bundle
+
+    def build(self):
+        columns = {field: [] for field in BUNDLE_FIELDS}
+        index = {}
+        with db.engine.connect() as conn:
+            version = current_version(conn)
+            for position, row in enumerate(conn.execute(bundle_query().execution_options(yield_per=1000))):
+                for field in BUNDLE_FIELDS:
+                    columns[field].append(getattr(row, field))
+                for key in {normalize(row.ukrainian), normalize(row.english)}:
+                    if key:
+                        index.setdefault(key, []).append(position)
+        payload = {
+            'version': version,
+            'count': len(columns['id']),
+            'fields': list(BUNDLE_FIELDS),
+            'columns': columns,
+            'index': index,
+        }
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode()
+        return version, gzip.compress(body, compresslevel=9)
+
+
+def translation_delta(since):
+    """Rows changed and ids deleted after version ``since``.
+
+    Raises ValueError for a version newer than the phrasebook's own.
+    """
+    with db.engine.connect() as conn:
+        version = current_version(conn)
+        if since > version:
+            raise ValueError(since)
+        cutoff = from_version(since) - DELTA_OVERLAP
+        changed = conn.execute(changed_query(cutoff)).all()
+        deleted = conn.execute(deleted_query(cutoff)).scalars().all()
+    return {
+        'since': since,
+        'version': version,
+        'changed': [{f: getattr(row, f) for f in BUNDLE_FIELDS} for row in changed],
+        'deleted': deleted,
+    }
+
+
+phrasebook_bundle = PhrasebookBundle()
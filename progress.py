@@ -0,0 +1,365 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import and_, bindparam, case, delete, exists, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from models import Lesson, LessonProgress, PhraseReview, ProgressEvent, Translation
+from translation_engine import serialize
+
+# Learner ids are generated by the client and kept in its storage
+LEARNER_ID = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+# Event ids likewise; they are unique per learner
+EVENT_ID = LEARNER_ID
+
+MAX_EVENTS = 500
+# Offline clients sync late, but not from the future or the distant past
+MAX_EVENT_AGE = timedelta(days=30)
+# One time_spent event never counts for more than this
+MAX_TIME_SPENT_MS = 4 * 60 * 60 * 1000
+
+MIN_EASINESS = 1.3
+DEFAULT_EASINESS = 2.5
+
+EVENT_TYPES = ('lesson_completed', 'time_spent', 'practice', 'review')
+
+# Attempts at writing a batch that lost a race with another batch
+WRITE_ATTEMPTS = 3
+
+
+class StaleReview(Exception):
+    """A review row changed between reading and updating it"""
+
+
+def valid_learner(learner_id):
+    return bool(learner_id) and LEARNER_ID.match(learner_id) is not None
+
+
+def sm2(easiness, interval, repetitions, quality):
+    """SM-2: the next (easiness, interval in days, repetitions) after an answer of ``quality`` 0-5"""
+    if quality < 3:
+        # Forgotten: start the sequence again, keeping the (lowered) easiness
+        repetitions = 0
+        interval = 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = max(1, round(interval * easiness))
+    easiness = max(MIN_EASINESS, easiness + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return easiness, interval, repetitions
+
+
+def _event_time(value, now):
+    if value is None:
+        return now
+    try:
+        moment = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"invalid time {value!r}") from None
+    if moment.tzinfo is not None:
+        # Stored times are naive UTC, like created_at everywhere else
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    if moment > now:
+        return now
+    if moment < now - MAX_EVENT_AGE:
+        raise ValueError("event is too old")
+    return moment
+
+
+def _int_field(event, name, low=None, high=None, required=True):
+    value = event.get(name)
+    if value is None and not required:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise ValueError(f"{name} must be an integer")
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if (low is not None and value < low) or (high is not None and value > high):
+        raise ValueError(f"{name} must be between {low} and {high}")
+    return value
+
+
+def event_id(event):
+    """The client's id for ``event``, or None for clients that send none"""
+    value = event.get('id') if isinstance(event, dict) else None
+    if value is None:
+        return None
+    if not isinstance(value, str) or EVENT_ID.match(value) is None:
+        raise ValueError("invalid event id")
+    return value
+
+
+def parse_event(event, now):
+    """(type, target id, fields) from one client event, or ValueError"""
+    if not isinstance(event, dict):
+        raise ValueError("event must be an object")
+    kind = event.get('type')
+    if kind not in EVENT_TYPES:
+        raise ValueError(f"unknown event type {kind!r}")
+    at = _event_time(event.get('at'), now)
+    if kind == 'review':
+        return kind, _int_field(event, 'translation_id', 1), {
+            'quality': _int_field(event, 'quality', 0, 5),
+            'at': at,
+        }
+    lesson_id = _int_field(event, 'lesson_id', 1)
+    if kind == 'time_spent':
+        return kind, lesson_id, {'ms': min(_int_field(event, 'ms', 0), MAX_TIME_SPENT_MS)}
+    if kind == 'practice':
+        return kind, lesson_id, {'score': _int_field(event, 'score', 0, 100, required=False)}
+    return kind, lesson_id, {'at': at}
+
+
+def record_events(learner_id, events, now=None):
+    """Apply a batch of progress events for one learner in a single transaction.
+
+    Events for the same lesson are merged before writing, so a batch costs
+    one insert or update per lesson and per reviewed phrase, whatever its
+    length.  Invalid events are reported by position and skipped.  Events
+    whose ``id`` was already applied (a batch resent after a lost response)
+    are accepted without being counted again.
+    """
+    now = now or datetime.utcnow()
+    errors = []
+    parsed = []
+    for index, event in enumerate(events):
+        try:
+            parsed.append((index, event_id(event), *parse_event(event, now)))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+
+    lesson_ids = {target for _, _, kind, target, _ in parsed if kind != 'review'}
+    translation_ids = {target for _, _, kind, target, _ in parsed if kind == 'review'}
+    known_lessons = set(
+        db.session.execute(select(Lesson.id).where(Lesson.id.in_(lesson_ids))).scalars()
+    ) if lesson_ids else set()
+    known_phrases = set(
+        db.session.execute(select(Translation.id).where(Translation.id.in_(translation_ids))).scalars()
+    ) if translation_ids else set()
+
+    valid = []
+    for index, client_id, kind, target, fields in parsed:
+        if kind == 'review' and target not in known_phrases:
+            errors.append({'index': index, 'error': f"unknown translation {target}"})
+        elif kind != 'review' and target not in known_lessons:
+            errors.append({'index': index, 'error': f"unknown lesson {target}"})
+        else:
+            valid.append((client_id, kind, target, fields))
+
+    # A concurrent batch for the same learner can win the insert race or
+    # update a review in between; the retry then sees its writes
+    for attempt in range(WRITE_ATTEMPTS):
+        try:
+            fresh = _claim_events(learner_id, valid, now)
+            lessons, reviews = _merge_events(fresh)
+            _write_lessons(learner_id, lessons, now)
+            _write_reviews(learner_id, reviews, now)
+            db.session.commit()
+            break
+        except (IntegrityError, StaleReview):
+            db.session.rollback()
+            if attempt == WRITE_ATTEMPTS - 1:
+                raise
+    errors.sort(key=lambda e: e['index'])
+    return {'accepted': len(valid), 'errors': errors}
+
+
+def _claim_events(learner_id, events, now):
+    """The ``events`` not applied before, recording their ids as applied"""
+    ids = list({client_id for client_id, *_ in events if client_id is not None})
+    if not ids:
+        return events
+    seen = set(db.session.execute(
+        select(ProgressEvent.event_id).where(ProgressEvent.learner_id == learner_id, ProgressEvent.event_id.in_(ids))
+    ).scalars())
+    # Older events are refused anyway, so their ids need not be kept
+    db.session.execute(delete(ProgressEvent).where(ProgressEvent.learner_id == learner_id,
+                                                   ProgressEvent.recorded_at < now - MAX_EVENT_AGE))
+    claimed = [i for i in ids if i not in seen]
+    if claimed:
+        # A batch sent twice at once fails here with IntegrityError and retries
+        db.session.execute(insert(ProgressEvent), [
+            {'learner_id': learner_id, 'event_id': i, 'recorded_at': now} for i in claimed
+        ])
+    return [event for event in events if event[0] is None or event[0] not in seen]
+
+
+def _merge_events(events):
+    """({lesson id: delta}, {translation id: [(at, quality)]}) from parsed events"""
+    lessons = {}
+    reviews = {}
+    for _, kind, target, fields in events:
+        if kind == 'review':
+            reviews.setdefault(target, []).append((fields['at'], fields['quality']))
+        else:
+            delta = lessons.setdefault(target, {'completed_at': None, 'time_spent_ms': 0, 'practice_count': 0,
+                                                'best_score': None})
+            if kind == 'lesson_completed':
+                if delta['completed_at'] is None or fields['at'] < delta['completed_at']:
+                    delta['completed_at'] = fields['at']
+            elif kind == 'time_spent':
+                delta['time_spent_ms'] += fields['ms']
+            else:
+                delta['practice_count'] += 1
+                if fields['score'] is not None:
+                    delta['best_score'] = max(delta['best_score'] or 0, fields['score'])
+    return lessons, reviews
+
+
+def _write_lessons(learner_id, lessons, now):
+    if not lessons:
+        return
+    existing = set(db.session.execute(
+        select(LessonProgress.lesson_id).where(LessonProgress.learner_id == learner_id,
+                                               LessonProgress.lesson_id.in_(list(lessons)))
+    ).scalars())
+    inserts = [dict(delta, learner_id=learner_id, lesson_id=lesson_id, updated_at=now)
+               for lesson_id, delta in lessons.items() if lesson_id not in existing]
+    updates = [{'key_lesson': lesson_id, 'new_completed_at': delta['completed_at'], 'add_ms': delta['time_spent_ms'],
+                'add_practice': delta['practice_count'], 'new_score': delta['best_score']}
+               for lesson_id, delta in lessons.items() if lesson_id in existing]
+    if inserts:
+        db.session.execute(insert(LessonProgress), inserts)
+    if updates:
+        # Increments happen in SQL so concurrent batches add up instead of overwriting
+        table = LessonProgress.__table__
+        new_score = bindparam('new_score')
+        db.session.execute(
+            update(table)
+            .where(table.c.learner_id == learner_id, table.c.lesson_id == bindparam('key_lesson'))
+            .values(
+                completed_at=func.coalesce(table.c.completed_at, bindparam('new_completed_at')),
+                time_spent_ms=table.c.time_spent_ms + bindparam('add_ms'),
+                practice_count=table.c.practice_count + bindparam('add_practice'),
+                best_score=case(
+                    (and_(new_score.isnot(None),
+                          (table.c.best_score.is_(None)) | (table.c.best_score < new_score)), new_score),
+                    else_=table.c.best_score,
+                ),
+                updated_at=now,
+            ),
+            updates,
+        )
+
+
+def _write_reviews(learner_id, reviews, now):
+    if not reviews:
+        return
+    existing = {
+        row.translation_id: row
+        for row in db.session.execute(
+            select(PhraseReview.translation_id, PhraseReview.easiness, PhraseReview.interval_days,
+                   PhraseReview.repetitions, PhraseReview.lapses, PhraseReview.last_reviewed_at)
+            .where(PhraseReview.learner_id == learner_id, PhraseReview.translation_id.in_(list(reviews)))
+        )
+    }
+    inserts, updates = [], []
+    for translation_id, answers in reviews.items():
+        state = existing.get(translation_id)
+        easiness = state.easiness if state else DEFAULT_EASINESS
+        interval = state.interval_days if state else 0
+        repetitions = state.repetitions if state else 0
+        lapses = state.lapses if state else 0
+        last = state.last_reviewed_at if state else None
+        for at, quality in sorted(answers):
+            if last is not None and at <= last:
+                # Already applied, e.g. a batch resent after a lost response
+                continue
+            easiness, interval, repetitions = sm2(easiness, interval, repetitions, quality)
+            lapses += quality < 3
+            last = at
+        if state is not None and last == state.last_reviewed_at:
+            continue
+        row = {
+            'learner_id': learner_id,
+            'translation_id': translation_id,
+            'easiness': easiness,
+            'interval_days': interval,
+            'repetitions': repetitions,
+            'lapses': lapses,
+            'due_at': last + timedelta(days=interval),
+            'last_reviewed_at': last,
+        }
+        if state:
+            row['read_reviewed_at'] = state.last_reviewed_at
+            updates.append(row)
+        else:
+            inserts.append(row)
+    if inserts:
+        db.session.execute(insert(PhraseReview), inserts)
+    if updates:
+        # Only rows still as read: SM-2 state is computed from the previous
+        # state, so a concurrent batch's review must not be overwritten
+        table = PhraseReview.__table__
+        columns = ('easiness', 'interval_days', 'repetitions', 'lapses', 'due_at', 'last_reviewed_at')
+        result = db.session.execute(
+            update(table)
+            .where(table.c.learner_id == learner_id,
+                   table.c.translation_id == bindparam('key_translation'),
+                   table.c.last_reviewed_at.is_not_distinct_from(bindparam('read_reviewed_at')))
+            .values({c: bindparam('new_' + c) for c in columns}),
+            [dict({'new_' + c: row[c] for c in columns}, key_translation=row['translation_id'],
+                  read_reviewed_at=row['read_reviewed_at']) for row in updates],
+        )
+        if result.supports_sane_multi_rowcount() and result.rowcount != len(updates):
+            raise StaleReview(learner_id)
+
+
+def lesson_progress(learner_id):
+    """{lesson id: progress} for one learner"""
+    rows = db.session.execute(
+        select(LessonProgress, Lesson.level)
+        .join(Lesson, Lesson.id == LessonProgress.lesson_id)
+        .where(LessonProgress.learner_id == learner_id)
+    )
+    return {
+        row.lesson_id: {
+            'level': level,
+            'completed': row.completed_at is not None,
+            'completed_at': row.completed_at.isoformat() + 'Z' if row.completed_at else None,
+            'time_spent_ms': row.time_spent_ms,
+            'practice_count': row.practice_count,
+            'best_score': row.best_score,
+        }
+        for row, level in rows
+    }
+
+
+def due_query(learner_id, until, limit, category=None):
+    query = (
+        select(Translation, PhraseReview.due_at, PhraseReview.interval_days, PhraseReview.repetitions)
+        .join(PhraseReview, PhraseReview.translation_id == Translation.id)
+        .where(PhraseReview.learner_id == learner_id, PhraseReview.due_at <= until)
+    )
+    if category:
+        query = query.where(Translation.category == category)
+    return query.order_by(PhraseReview.due_at).limit(limit)
+
+
+def new_query(learner_id, limit, category=None):
+    query = select(Translation).where(~exists().where(
+        PhraseReview.learner_id == learner_id, PhraseReview.translation_id == Translation.id
+    ))
+    if category:
+        query = query.where(Translation.category == category)
+    return query.order_by(Translation.id).limit(limit)
+
+
+def due_reviews(learner_id, until, limit=20, new=0, category=None):
+    """Phrases due for review by ``until``, oldest first, plus up to ``new`` never-seen ones"""
+    due = db.session.execute(due_query(learner_id, until, limit, category)).all()
+    fresh = []
+    if new:
+        fresh = db.session.execute(new_query(learner_id, new, category)).scalars().all()
+    return {
+        'due': [dict(serialize(row.Translation), due_at=row.due_at.isoformat() + 'Z',
+                     interval_days=row.interval_days, repetitions=row.repetitions) for row in due],
+        'new': [serialize(translation) for translation in fresh],
+    }
@@ -0,0 +1,154 @@
+import re
+from functools import lru_cache
+
+from translation_engine import normalize
+
+try:
+    import numpy as np
+except ImportError:  # the "fast" extra; scoring falls back to pure Python
+    np = None
+
+# Ukrainian national transliteration, plus the Russian letters speech
+# recognizers tend to produce for Ukrainian audio
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'h', 'ґ': 'g', 'д': 'd', 'е': 'e', 'є': 'ye', 'ж': 'zh',
+    'з': 'z', 'и': 'y', 'і': 'i', 'ї': 'yi', 'й': 'y', 'к': 'k', 'л': 'l', 'м': 'm', 'н': 'n',
+    'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u', 'ф': 'f', 'х': 'kh', 'ц': 'ts',
+    'ч': 'ch', 'ш': 'sh', 'щ': 'shch', 'ь': '', 'ю': 'yu', 'я': 'ya', "'": '',
+    'ы': 'y', 'э': 'e', 'ё': 'yo', 'ъ': '',
+}
+
+# Spellings of one sound folded to one symbol, longest first.  The
+# pronunciation guides write і as "ee" and и as "y"; both fold to "i".
+SOUND_FOLDS = [
+    ('shch', 'ŝ'), ('sch', 'ŝ'), ('zh', 'ž'), ('kh', 'x'), ('ch', 'č'), ('sh', 'š'), ('ts', 'c'),
+    ('tz', 'c'), ('ee', 'i'), ('oo', 'u'), ('ou', 'u'), ('ph', 'f'), ('ck', 'k'), ('w', 'v'),
+    ('q', 'k'), ('ya', 'ja'), ('yu', 'ju'), ('ye', 'je'), ('yi', 'ji'), ('yo', 'jo'), ('ia', 'ja'),
+    ('iu', 'ju'), ('y', 'i'),
+]
+SOUND_FOLD_RE = re.compile('|'.join(re.escape(s) for s, _ in SOUND_FOLDS))
+SOUND_FOLD_MAP = dict(SOUND_FOLDS)
+
+# Sounds learners (and recognizers) confuse cost half an edit
+SIMILAR_SOUNDS = ['bp', 'dt', 'gkxh', 'zs', 'žš', 'čcŝš', 'vf', 'ie', 'ou', 'ij']
+SIMILAR_COST = 0.5
+
+EXCELLENT = 0.8
+GOOD = 0.6
+
+# Below this many pairs the NumPy setup costs more than it saves
+VECTORIZE_MIN = 8
+
+_GROUPS = {}
+for _group, _sounds in enumerate(SIMILAR_SOUNDS, start=1):
+    for _sound in _sounds:
+        _GROUPS.setdefault(_sound, _group)
+
+
+@lru_cache(maxsize=4096)
+def phonetic(text):
+    """Coarse sound spelling of Cyrillic or Latin text, for comparing pronunciations"""
+    text = normalize(text)
+    text = ''.join(CYRILLIC_TO_LATIN.get(ch, ch) for ch in text)
+    text = re.sub(r"[^a-z]", '', text)
+    text = SOUND_FOLD_RE.sub(lambda m: SOUND_FOLD_MAP[m.group()], text)
+    # Doubled letters are one sound when spoken (Ukrainian нн, English ll)
+    return re.sub(r'(.)\1+', r'\1', text)
+
+
+def substitution_cost(a, b):
+    if a == b:
+        return 0.0
+    group = _GROUPS.get(a)
+    return SIMILAR_COST if group and group == _GROUPS.get(b) else 1.0
+
+
+def distance(a, b):
+    """Edit distance where similar sounds substitute for half an edit"""
+    previous = [float(j) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, start=1):
+        current = [float(i)]
+        for j, cb in enumerate(b, start=1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + substitution_cost(ca, cb)))
+        previous = current
+    return previous[-1]
+
+
+def similarity(a, b):
+    """1.0 for identical sound spellings, 0.0 for nothing in common"""
+    longest = max(len(a), len(b))
+    if not longest:
+        return 1.0
+    return max(0.0, 1.0 - distance(a, b) / longest)
+
+
+def _distances_numpy(pairs):
+    """Edit distances for many pairs at once, one DP row per step for the whole batch"""
+    count = len(pairs)
+    len_a = np.array([len(a) for a, _ in pairs])
+    len_b = np.array([len(b) for _, b in pairs])
+    width = int(len_b.max()) + 1
+    codes_a = np.zeros((count, max(int(len_a.max()), 1)), dtype=np.int32)
+    codes_b = np.zeros((count, width - 1 or 1), dtype=np.int32)
+    for n, (a, b) in enumerate(pairs):
+        codes_a[n, :len(a)] = [ord(ch) for ch in a]
+        codes_b[n, :len(b)] = [ord(ch) for ch in b]
+    groups = np.zeros(max(int(codes_a.max()), int(codes_b.max())) + 1, dtype=np.int32)
+    for sound, group in _GROUPS.items():
+        if ord(sound) < len(groups):
+            groups[ord(sound)] = group
+    group_b = groups[codes_b]
+
+    steps = np.arange(width, dtype=np.float64)
+    row = np.tile(steps, (count, 1))
+    result = np.where(len_a == 0, len_b, 0).astype(np.float64)
+    for i in range(1, int(len_a.max()) + 1):
+        column_a = codes_a[:, i - 1:i]
+        group_a = groups[column_a]
+        cost = np.where(column_a == codes_b, 0.0,
+                        np.where((group_a == group_b) & (group_a > 0), SIMILAR_COST, 1.0))
+        candidate = np.empty_like(row)
+        candidate[:, 0] = i
+        candidate[:, 1:] = np.minimum(row[:, 1:] + 1, row[:, :-1] + cost[:, :width - 1])
+        # Insertions chain along the row: d[j] = min over k <= j of d[k] + (j - k)
+        row = np.minimum.accumulate(candidate - steps, axis=1) + steps
+        done = len_a == i
+        result[done] = row[done, len_b[done]]
+    return result
+
+
+def score_pairs(pairs):
+    """Similarity scores for (spoken, expected) phonetic pairs"""
+    if np is not None and len(pairs) >= VECTORIZE_MIN:
+        distances = _distances_numpy(pairs)
+        longest = np.array([max(len(a), len(b), 1) for a, b in pairs])
+        return [float(s) for s in np.clip(1.0 - distances / longest, 0.0, 1.0)]
+    return [similarity(a, b) for a, b in pairs]
+
+
+def rating(score):
+    if score >= EXCELLENT:
+        return 'excellent'
+    if score >= GOOD:
+        return 'good'
+    return 'retry'
+
+
+def score_session(attempts):
+    """Score a practice session: ``attempts`` are (transcript, [accepted target texts]).
+
+    Each attempt scores against its closest target, so a phrase can be
+    matched by its Ukrainian spelling or by its pronunciation guide.
+    """
+    pairs = []
+    owners = []
+    for index, (transcript, targets) in enumerate(attempts):
+        spoken = phonetic(transcript)
+        for target in targets:
+            if target:
+                pairs.append((spoken, phonetic(target)))
+                owners.append(index)
+    best = [0.0] * len(attempts)
+    for owner, score in zip(owners, score_pairs(pairs)):
+        best[owner] = max(best[owner], score)
+    return [round(score, 3) for score in best]
@@ -0,0 +1,133 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import select, text
+
+from app import db
+from models import Translation, Lesson, CommunityInfo, HeritageInfo, Resource, PhraseReview
+import phrasebook
+import progress
+import routes
+import timeline
+from facets import facets
+
+# Used when the table to sample from is empty
+DEFAULT_CATEGORY = 'greetings'
+DEFAULT_LEARNER = 'learner-00000000'
+
+
+class AuditedQuery:
+    """A statement a route runs, and the plan steps it may take anyway.
+
+    ``allow`` holds ``'scan'`` for queries that read a whole table on
+    purpose (unfiltered listings) and ``'sort'`` where sorting one
+    filtered slice is cheaper than another index.
+    """
+
+    def __init__(self, route, name, statement, allow=()):
+        self.route = route
+        self.name = name
+        self.statement = statement
+        self.allow = set(allow)
+
+
+def sample(column, default):
+    """A value of ``column`` that occurs in the data, so plans are built on real matches"""
+    return db.session.execute(select(column).where(column.isnot(None)).limit(1)).scalar() or default
+
+
+def audited_queries():
+    """The statements behind the public routes, built by the routes' own query helpers"""
+    now = datetime.now()
+    category = sample(Translation.category, DEFAULT_CATEGORY)
+    learner = sample(PhraseReview.learner_id, DEFAULT_LEARNER)
+    fields = list(routes.DEFAULT_TRANSLATION_FIELDS)
+    changed, deleted = phrasebook.version_queries()
+    queries = [
+        AuditedQuery('index', 'featured community', routes.featured_query(CommunityInfo), allow={'scan'}),
+        AuditedQuery('index', 'featured heritage', routes.featured_query(HeritageInfo), allow={'scan'}),
+        AuditedQuery('api_translations', 'by category',
+                     routes.translation_listing(fields, 'id', category), allow={'sort'}),
+        AuditedQuery('api_translations', 'category order page',
+                     routes.translation_listing(fields, 'category', after=[category, 'а', 0])
+                     .limit(routes.MAX_PAGE_SIZE + 1)),
+        AuditedQuery('api_translations', 'category order page, filtered',
+                     routes.translation_listing(fields, 'category', category).limit(routes.MAX_PAGE_SIZE + 1)),
+        AuditedQuery('translation_delta', 'changed rows', phrasebook.changed_query(now)),
+        AuditedQuery('translation_delta', 'deleted ids', phrasebook.deleted_query(now)),
+        AuditedQuery('translation_bundle', 'version', changed),
+        AuditedQuery('translation_bundle', 'version, deletions', deleted),
+        AuditedQuery('translation_bundle', 'rows', phrasebook.bundle_query(), allow={'scan'}),
+        AuditedQuery('lessons', 'ordered lessons', routes.lesson_cards_query()),
+        AuditedQuery('lesson_detail', 'lesson', routes.lesson_query(sample(Lesson.id, 1))),
+        AuditedQuery('timeline', 'upcoming events', timeline.upcoming_query(now)),
+        AuditedQuery('timeline', 'past events', timeline.past_query(now, timeline.PAST_EVENTS)),
+        AuditedQuery('admin_translations', 'listing page',
+                     routes.admin_listing().limit(routes.ADMIN_PAGE_SIZE).offset(routes.ADMIN_PAGE_SIZE)),
+        AuditedQuery('api_reviews_due', 'due phrases', progress.due_query(learner, now, 20)),
+        AuditedQuery('api_reviews_due', 'due phrases, by category', progress.due_query(learner, now, 20, category)),
+        # Walks translations in id order and stops at the limit
+        AuditedQuery('api_reviews_due', 'new phrases', progress.new_query(learner, 10), allow={'scan'}),
+        AuditedQuery('api_reviews_due', 'new phrases, by category', progress.new_query(learner, 10, category),
+                     allow={'sort'}),
+        AuditedQuery('search', 'hits by id', routes.search_hits_query(Translation, [1, 2, 3])),
+    ]
+    for model, route in ((CommunityInfo, 'community'), (HeritageInfo, 'heritage'), (Resource, 'resources')):
+        queries.append(AuditedQuery(route, 'by category',
+                                    routes.category_listing(model, sample(model.category, DEFAULT_CATEGORY))))
+    for facet in facets.by_kind.values():
+        queries.append(AuditedQuery('facets', f'{facet.kind} on first use', facet.query(), allow={'scan'}))
+    return queries
+
+
+def explain(conn, statement):
+    """Plan steps of ``statement`` as (description, flag) pairs.
+
+    The flag is ``'scan'`` for a sequential read of a whole table,
+    ``'sort'`` for a separate sort step, and None otherwise.
+    """
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={'literal_binds': True}))
+    if conn.dialect.name == 'sqlite':
+        return [(row.detail, sqlite_flag(row.detail))
+                for row in conn.execute(text('EXPLAIN QUERY PLAN ' + sql))]
+    if conn.dialect.name == 'postgresql':
+        # Small tables are always cheapest to scan, so disable sequential
+        # scans: one left in the plan means no index can serve the query
+        conn.execute(text('SET LOCAL enable_seqscan = off'))
+        plan = conn.execute(text('EXPLAIN (FORMAT JSON) ' + sql)).scalar()
+        conn.rollback()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return list(postgres_steps(plan[0]['Plan']))
+    raise ValueError(f"No query plan audit for {conn.dialect.name}")
+
+
+def sqlite_flag(detail):
+    if detail.startswith('SCAN ') and ' USING ' not in detail:
+        return 'scan'
+    if 'USE TEMP B-TREE' in detail:
+        return 'sort'
+    return None
+
+
+def postgres_steps(node, depth=0):
+    description = node['Node Type']
+    if 'Relation Name' in node:
+        description += ' on ' + node['Relation Name']
+    if 'Index Name' in node:
+        description += ' using ' + node['Index Name']
+    flag = {'Seq Scan': 'scan', 'Sort': 'sort', 'Incremental Sort': 'sort'}.get(node['Node Type'])
+    yield '  ' * depth + description, flag
+    for child in node.get('Plans', ()):
+        yield from postgres_steps(child, depth + 1)
+
+
+def audit():
+    """(query, steps, problems) for every audited query"""
+    results = []
+    with db.engine.connect() as conn:
+        for query in audited_queries():
+            steps = explain(conn, query.statement)
+            problems = sorted({flag for _, flag in steps if flag and flag not in query.allow})
+            results.append((query, steps, problems))
+    return results
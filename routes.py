@@ -1,95 +1,364 @@
-from flask import render_template, request, jsonify, redirect, url_for, flash
+from flask import render_template, request, jsonify, redirect, url_for, flash, Response, stream_with_context
 from app import app, db
 from models import Translation, Lesson, CommunityInfo, HeritageInfo, Event, Resource
 from forms import TranslationForm, LessonForm, CommunityForm, HeritageForm, EventForm, ResourceForm
-from datetime import datetime
-from sqlalchemy import or_
+from translation_engine import phrase_index
+from search import search_index, SEARCHABLES, BY_KIND
+from cache import response_cache
+from versioning import model_versions
+from phrasebook import phrasebook_bundle, translation_delta
+from facets import facets
+from timeline import timeline
+from lesson_content import lesson_fragments
+from progress import MAX_EVENTS, valid_learner, record_events, lesson_progress, due_reviews
+from pronunciation import score_session, rating
+from importer import DATASETS, csv_records, existing_ids, import_records, validate_records
+from datetime import datetime, timedelta
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.exc import IntegrityError
+from flask_wtf.csrf import generate_csrf, validate_csrf
+from wtforms.validators import ValidationError
+from sqlalchemy.orm import defer, load_only, undefer_group
+import base64
+import gzip
+import io
+import json
+
+# /api/translations paging and projection
+TRANSLATION_FIELDS = ('id', 'ukrainian', 'english', 'pronunciation', 'category', 'subcategory', 'difficulty_level')
+DEFAULT_TRANSLATION_FIELDS = ('id', 'ukrainian', 'english', 'pronunciation', 'category', 'subcategory')
+TRANSLATION_ORDERINGS = {
+    'id': [Translation.id],
+    'category': [Translation.category, Translation.ukrainian, Translation.id],
+}
+MAX_PAGE_SIZE = 1000
+STREAM_BATCH_SIZE = 500
 
 @app.route('/')
+@model_versions.conditional(Event, CommunityInfo, HeritageInfo)
+@response_cache.cached(Event, CommunityInfo, HeritageInfo)
 def index():
     # Get featured content for homepage
-    recent_events = Event.query.filter(Event.date >= datetime.now()).order_by(Event.date).limit(3).all()
-    featured_community = CommunityInfo.query.limit(3).all()
-    featured_heritage = HeritageInfo.query.limit(3).all()
+    recent_events = timeline.upcoming(3)
+    featured_community = db.session.scalars(featured_query(CommunityInfo)).all()
+    featured_heritage = db.session.scalars(featured_query(HeritageInfo)).all()
     
     return render_template('index.html', 
                          recent_events=recent_events,
                          featured_community=featured_community,
                          featured_heritage=featured_heritage)
 
+def featured_query(model, limit=3):
+    return select(model).limit(limit)
+
 @app.route('/translator')
+@model_versions.conditional(Translation)
+@response_cache.cached(Translation)
 def translator():
-    categories = db.session.query(Translation.category).distinct().all()
-    categories = [cat[0] for cat in categories]
-    return render_template('translator.html', categories=categories)
+    return render_template('translator.html', categories=facets.counts(Translation))
 
 @app.route('/api/translations')
+@model_versions.conditional(Translation)
 def api_translations():
     category = request.args.get('category', 'all')
     search = request.args.get('search', '')
+    order = request.args.get('order', 'id')
+    output_format = request.args.get('format', 'json')
+    limit = request.args.get('limit', type=int)
+    
+    if order not in TRANSLATION_ORDERINGS:
+        return jsonify({'error': f'Unknown order {order!r}'}), 400
+    
+    fields = request.args.get('fields')
+    fields = [f for f in fields.split(',') if f] if fields else list(DEFAULT_TRANSLATION_FIELDS)
+    unknown = [f for f in fields if f not in TRANSLATION_FIELDS]
+    if unknown:
+        return jsonify({'error': f'Unknown fields: {", ".join(unknown)}'}), 400
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    
+    key_columns = TRANSLATION_ORDERINGS[order]
+    cursor = request.args.get('cursor')
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, key_columns)
+        except ValueError:
+            return jsonify({'error': 'Invalid cursor'}), 400
+    query = translation_listing(fields, order, category, search, after)
     
-    query = Translation.query
+    if output_format in ('ndjson', 'stream'):
+        # No page size cap: streaming never holds the rows in memory
+        if limit is not None:
+            query = query.limit(max(1, limit))
+        return stream_translations(query, fields, output_format)
+    
+    if limit is None:
+        # Unpaginated list, kept for the service worker and older clients
+        return jsonify([{f: row._mapping[f] for f in fields} for row in db.session.execute(query)])
+    
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    rows = db.session.execute(query.limit(limit + 1)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor([rows[-1]._mapping[c.key] for c in key_columns])
+    
+    return jsonify({
+        'items': [{f: row._mapping[f] for f in fields} for row in rows],
+        'next_cursor': next_cursor
+    })
+
+def translation_listing(fields, order='id', category='all', search='', after=None):
+    """The /api/translations query: ``fields`` in ``order``, after the cursor values ``after``"""
+    # Only the requested columns (plus the ordering key) are selected
+    key_columns = TRANSLATION_ORDERINGS[order]
+    columns = list(dict.fromkeys([getattr(Translation, f) for f in fields] + key_columns))
+    query = select(*columns).order_by(*key_columns)
     
     if category != 'all':
-        query = query.filter(Translation.category == category)
+        query = query.where(Translation.category == category)
     
     if search:
-        query = query.filter(
+        query = query.where(
             or_(
                 Translation.ukrainian.contains(search),
                 Translation.english.contains(search)
             )
         )
     
-    translations = query.all()
+    if after is not None:
+        query = query.where(tuple_(*key_columns) > tuple_(*after))
+    return query
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(values, ensure_ascii=False).encode()).decode().rstrip('=')
+
+def decode_cursor(cursor, key_columns):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise ValueError(cursor) from e
+    if not isinstance(values, list) or len(values) != len(key_columns):
+        raise ValueError(cursor)
+    # Each value is compared with its column, so it must be of the column's type
+    for value, column in zip(values, key_columns):
+        if isinstance(value, bool) or not isinstance(value, column.type.python_type):
+            raise ValueError(cursor)
+    return values
+
+def stream_translations(query, fields, output_format):
+    """Stream rows from a server-side cursor as NDJSON or one chunked JSON array"""
+    rows = db.session.execute(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+    
+    def ndjson():
+        for row in rows:
+            yield json.dumps({f: row._mapping[f] for f in fields}, ensure_ascii=False) + '\n'
     
-    return jsonify([{
-        'id': t.id,
-        'ukrainian': t.ukrainian,
-        'english': t.english,
-        'pronunciation': t.pronunciation,
-        'category': t.category,
-        'subcategory': t.subcategory
-    } for t in translations])
+    def json_array():
+        yield '['
+        for i, row in enumerate(rows):
+            yield (',' if i else '') + json.dumps({f: row._mapping[f] for f in fields}, ensure_ascii=False)
+        yield ']'
+    
+    if output_format == 'ndjson':
+        return Response(stream_with_context(ndjson()), mimetype='application/x-ndjson')
+    return Response(stream_with_context(json_array()), mimetype='application/json')
+
+@app.route('/api/translations/bundle')
+@model_versions.conditional(Translation)
+def api_translations_bundle():
+    token, _ = model_versions.stamp([Translation])
+    version, body = phrasebook_bundle.get(token)
+    
+    if 'gzip' in request.accept_encodings:
+        response = Response(body, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(gzip.decompress(body), mimetype='application/json')
+    response.headers['X-Phrasebook-Version'] = str(version)
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.route('/api/translations/delta')
+@model_versions.conditional(Translation)
+def api_translations_delta():
+    since = request.args.get('since', type=int)
+    if since is None or since < 0:
+        return jsonify({'error': 'since must be a phrasebook version'}), 400
+    
+    # Clients drop 'deleted' ids before applying 'changed' rows
+    try:
+        return jsonify(translation_delta(since))
+    except ValueError:
+        return jsonify({'error': 'since is newer than the phrasebook'}), 400
+
+@app.route('/api/facets')
+@model_versions.conditional(*facets.models)
+def api_facets():
+    kinds = request.args.get('kinds')
+    kinds = [k for k in kinds.split(',') if k] if kinds else None
+    unknown = [k for k in kinds or () if k not in facets.by_kind]
+    if unknown:
+        return jsonify({'error': f'Unknown facets: {", ".join(unknown)}'}), 400
+    return jsonify(facets.summary(kinds))
+
+@app.route('/api/translate')
+def api_translate():
+    text = request.args.get('q', '').strip()
+    if not text:
+        return jsonify({'error': 'Missing query parameter q'}), 400
+    
+    limit = max(1, min(request.args.get('limit', 5, type=int), 50))
+    return jsonify(phrase_index.lookup(text, limit=limit))
 
 @app.route('/lessons')
+@model_versions.conditional(Lesson)
+@response_cache.cached(Lesson)
 def lessons():
-    lessons = Lesson.query.order_by(Lesson.order_index).all()
+    lessons = db.session.scalars(lesson_cards_query()).all()
     return render_template('lessons.html', lessons=lessons)
 
+def lesson_cards_query():
+    # The cards only show these; content and its rendering stay in the database
+    return select(Lesson).options(
+        load_only(Lesson.id, Lesson.title, Lesson.description, Lesson.level, Lesson.order_index)
+    ).order_by(Lesson.order_index)
+
 @app.route('/lessons/<int:lesson_id>')
+@model_versions.conditional(Lesson)
+@response_cache.cached(Lesson)
 def lesson_detail(lesson_id):
-    lesson = Lesson.query.get_or_404(lesson_id)
-    return render_template('lesson_detail.html', lesson=lesson)
+    lesson = lesson_with_fragment(lesson_id)
+    return render_template('lesson_detail.html', lesson=lesson,
+                           lesson_html=lesson_fragments.get(lesson).html)
+
+@app.route('/lessons/<int:lesson_id>/content')
+@model_versions.conditional(Lesson)
+def lesson_body(lesson_id):
+    # The lesson body alone, for offline caching and in-page loading
+    fragment = lesson_fragments.get(lesson_with_fragment(lesson_id))
+    if 'gzip' in request.accept_encodings:
+        response = Response(fragment.gzip, mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(str(fragment.html), mimetype='text/html')
+    response.headers['X-Content-Hash'] = fragment.content_hash
+    response.vary.add('Accept-Encoding')
+    return response
+
+def lesson_with_fragment(lesson_id):
+    return db.first_or_404(lesson_query(lesson_id))
+
+def lesson_query(lesson_id):
+    # Bodies are loaded only if the fragment cache misses
+    return select(Lesson).options(defer(Lesson.content), defer(Lesson.rendered_html)).where(Lesson.id == lesson_id)
+
+@app.route('/api/progress', methods=['GET', 'POST'])
+def api_progress():
+    # Learners are anonymous; the client generates and keeps its own id
+    learner_id = request.headers.get('X-Learner-Id', '')
+    if not valid_learner(learner_id):
+        return jsonify({'error': 'Missing or invalid X-Learner-Id header'}), 400
+    
+    if request.method == 'GET':
+        return jsonify({'lessons': lesson_progress(learner_id)})
+    
+    data = request.get_json(silent=True)
+    events = data.get('events') if isinstance(data, dict) else None
+    if not isinstance(events, list):
+        return jsonify({'error': 'Expected a JSON object with an events list'}), 400
+    if len(events) > MAX_EVENTS:
+        return jsonify({'error': f'At most {MAX_EVENTS} events per request'}), 413
+    return jsonify(record_events(learner_id, events))
+
+@app.route('/api/reviews/due')
+def api_reviews_due():
+    learner_id = request.headers.get('X-Learner-Id', '')
+    if not valid_learner(learner_id):
+        return jsonify({'error': 'Missing or invalid X-Learner-Id header'}), 400
+    
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    new = max(0, min(request.args.get('new', 0, type=int), 50))
+    # Include phrases coming due later today
+    ahead = max(0, min(request.args.get('ahead_hours', 0, type=int), 24))
+    until = datetime.utcnow() + timedelta(hours=ahead)
+    return jsonify(due_reviews(learner_id, until, limit=limit, new=new, category=request.args.get('category')))
+
+# Attempts scored per /api/practice/score request
+MAX_PRACTICE_ATTEMPTS = 200
+
+@app.route('/api/practice/score', methods=['POST'])
+def api_practice_score():
+    data = request.get_json(silent=True)
+    attempts = data.get('attempts') if isinstance(data, dict) else None
+    if not isinstance(attempts, list):
+        return jsonify({'error': 'Expected a JSON object with an attempts list'}), 400
+    if len(attempts) > MAX_PRACTICE_ATTEMPTS:
+        return jsonify({'error': f'At most {MAX_PRACTICE_ATTEMPTS} attempts per request'}), 413
+    
+    # Targets come from the in-memory phrasebook, not the database
+    phrase_index.ensure_loaded()
+    scored, errors = [], []
+    for index, attempt in enumerate(attempts):
+        if not isinstance(attempt, dict) or not isinstance(attempt.get('transcript'), str):
+            errors.append({'index': index, 'error': 'transcript is required'})
+            continue
+        if attempt.get('translation_id') is not None:
+            translation_id = attempt['translation_id']
+            # JSON true is an int to Python but never an id
+            valid = isinstance(translation_id, int) and not isinstance(translation_id, bool)
+            entry = phrase_index.entries.get(translation_id) if valid else None
+            if entry is None:
+                errors.append({'index': index, 'error': f"unknown translation {attempt['translation_id']}"})
+                continue
+            # Ukrainian phrases match either their spelling or their pronunciation guide
+            targets = [entry['english']] if attempt.get('field') == 'english' else [entry['ukrainian'], entry['pronunciation']]
+        elif isinstance(attempt.get('expected'), str):
+            targets = [attempt['expected']]
+        else:
+            errors.append({'index': index, 'error': 'translation_id or expected is required'})
+            continue
+        scored.append((index, attempt['transcript'], targets))
+    
+    scores = score_session([(transcript, targets) for _, transcript, targets in scored])
+    results = [{'index': index, 'score': score, 'rating': rating(score)}
+               for (index, _, _), score in zip(scored, scores)]
+    return jsonify({
+        'results': results,
+        'average': round(sum(scores) / len(scores), 3) if scores else None,
+        'errors': errors,
+    })
 
 @app.route('/community')
+@model_versions.conditional(CommunityInfo)
+@response_cache.cached(CommunityInfo)
 def community():
     category = request.args.get('category', 'all')
     
-    query = CommunityInfo.query
-    if category != 'all':
-        query = query.filter(CommunityInfo.category == category)
-    
-    community_info = query.all()
-    categories = db.session.query(CommunityInfo.category).distinct().all()
-    categories = [cat[0] for cat in categories]
+    community_info = db.session.scalars(category_listing(CommunityInfo, category)).all()
+    categories = facets.counts(CommunityInfo)
     
     return render_template('community.html', 
                          community_info=community_info,
                          categories=categories,
                          selected_category=category)
 
+def category_listing(model, category='all'):
+    # The listing pages show the full bodies, so load them with the rows
+    query = select(model).options(undefer_group('body'))
+    if category != 'all':
+        query = query.where(model.category == category)
+    return query
+
 @app.route('/heritage')
+@model_versions.conditional(HeritageInfo)
+@response_cache.cached(HeritageInfo)
 def heritage():
     category = request.args.get('category', 'all')
     
-    query = HeritageInfo.query
-    if category != 'all':
-        query = query.filter(HeritageInfo.category == category)
-    
-    heritage_info = query.all()
-    categories = db.session.query(HeritageInfo.category).distinct().all()
-    categories = [cat[0] for cat in categories]
+    heritage_info = db.session.scalars(category_listing(HeritageInfo, category)).all()
+    categories = facets.counts(HeritageInfo)
     
     return render_template('heritage.html',
                          heritage_info=heritage_info,
@@ -97,35 +366,47 @@ def heritage():
                          selected_category=category)
 
 @app.route('/events')
+@model_versions.conditional(Event)
+@response_cache.cached(Event)
 def events():
-    upcoming_events = Event.query.filter(Event.date >= datetime.now()).order_by(Event.date).all()
-    past_events = Event.query.filter(Event.date < datetime.now()).order_by(Event.date.desc()).limit(10).all()
+    # Rollovers bump the Event version, so cached pages move on as events pass
+    upcoming_events = timeline.upcoming()
+    past_events = timeline.past()
     
     return render_template('events.html',
                          upcoming_events=upcoming_events,
                          past_events=past_events)
 
+@app.route('/events.ics')
+@model_versions.conditional(Event)
+def events_ics():
+    response = Response(timeline.ics(request.host), mimetype='text/calendar')
+    response.headers['Content-Disposition'] = 'inline; filename="ukrainian-winnipeg-events.ics"'
+    return response
+
 @app.route('/resources')
+@model_versions.conditional(Resource)
+@response_cache.cached(Resource)
 def resources():
     category = request.args.get('category', 'all')
     
-    query = Resource.query
-    if category != 'all':
-        query = query.filter(Resource.category == category)
-    
-    resources = query.all()
-    categories = db.session.query(Resource.category).distinct().all()
-    categories = [cat[0] for cat in categories]
+    resources = db.session.scalars(category_listing(Resource, category)).all()
+    categories = facets.counts(Resource)
     
     return render_template('resources.html',
                          resources=resources,
                          categories=categories,
                          selected_category=category)
 
+# Read by the admin page's scripts, which send it back as X-CSRFToken
+app.add_template_global(generate_csrf, 'csrf_token')
+
 @app.route('/admin')
 def admin():
     return render_template('admin.html')
 
+ADMIN_PAGE_SIZE = 50
+
 @app.route('/admin/translations', methods=['GET', 'POST'])
 def admin_translations():
     form = TranslationForm()
@@ -138,59 +419,131 @@ def admin_translations():
         translation.subcategory = form.subcategory.data
         translation.difficulty_level = form.difficulty_level.data
         db.session.add(translation)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            flash('A translation of that Ukrainian text already exists in this category.', 'error')
+            return redirect(url_for('admin_translations'))
         flash('Translation added successfully!', 'success')
         return redirect(url_for('admin_translations'))
     
-    translations = Translation.query.order_by(Translation.category, Translation.ukrainian).all()
+    page = request.args.get('page', 1, type=int)
+    translations = db.paginate(admin_listing(), page=page, per_page=ADMIN_PAGE_SIZE, error_out=False)
     return render_template('admin.html', form=form, translations=translations, section='translations')
 
+def admin_listing():
+    return select(Translation).order_by(Translation.category, Translation.ukrainian, Translation.id)
+
+MAX_BULK_ROWS = 10000
+
+def read_bulk_records():
+    """Rows posted as a JSON list (or ``{"rows": [...]}``), CSV text, or an uploaded file"""
+    upload = request.files.get('file')
+    if upload is not None:
+        if upload.filename.lower().endswith('.csv'):
+            return csv_records(io.StringIO(upload.read().decode('utf-8-sig')))
+        data = json.load(upload)
+    elif request.mimetype == 'text/csv':
+        return csv_records(io.StringIO(request.get_data(as_text=True)))
+    else:
+        data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('rows')
+    if not isinstance(data, list):
+        raise ValueError('Expected a JSON list of rows, CSV, or an uploaded file')
+    return data
+
+@app.route('/admin/api/<dataset>', methods=['POST'])
+def admin_bulk(dataset):
+    """Validate a batch of rows with the admin form and insert them in one transaction.
+
+    Rows whose natural key already exists are refused with 409; with
+    ``?on_conflict=update`` they are overwritten instead.  The session's
+    CSRF token must come in the ``X-CSRFToken`` header, as the admin
+    forms' own token would.
+    """
+    if dataset not in DATASETS:
+        return jsonify({'error': f'Unknown dataset {dataset!r}', 'datasets': list(DATASETS)}), 404
+    if app.config.get('WTF_CSRF_ENABLED', True):
+        try:
+            validate_csrf(request.headers.get('X-CSRFToken'))
+        except ValidationError as e:
+            return jsonify({'error': str(e)}), 400
+    try:
+        records = read_bulk_records()
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    if len(records) > MAX_BULK_ROWS:
+        return jsonify({'error': f'At most {MAX_BULK_ROWS} rows per request'}), 413
+
+    rows, errors = validate_records(dataset, records)
+    if errors:
+        # Nothing is written unless every row is valid
+        return jsonify({'inserted': 0, 'updated': 0, 'errors': errors}), 422
+
+    if request.args.get('on_conflict', 'reject') != 'update':
+        spec = DATASETS[dataset]
+        found = existing_ids(spec, [spec.natural_key(row) for row in rows])
+        duplicates = [{'row': line, 'errors': {f: ['already exists'] for f in spec.key}}
+                      for line, row in enumerate(rows, start=1) if spec.natural_key(row) in found]
+        if duplicates:
+            return jsonify({'inserted': 0, 'updated': 0, 'errors': duplicates}), 409
+    try:
+        stats = import_records(dataset, rows, coerced=True)
+    except IntegrityError:
+        # Another request inserted the same key first
+        return jsonify({'inserted': 0, 'updated': 0, 'error': 'A row with the same key was just added'}), 409
+    return jsonify(dict(stats, errors=[]))
+
 @app.route('/search')
+@model_versions.conditional(*[s.model for s in SEARCHABLES])
 def search():
     query = request.args.get('q', '')
     if not query:
         return redirect(url_for('index'))
     
-    # Search across all content
-    translation_results = Translation.query.filter(
-        or_(
-            Translation.ukrainian.contains(query),
-            Translation.english.contains(query)
-        )
-    ).limit(10).all()
-    
-    community_results = CommunityInfo.query.filter(
-        or_(
-            CommunityInfo.title.contains(query),
-            CommunityInfo.content.contains(query)
-        )
-    ).limit(10).all()
-    
-    heritage_results = HeritageInfo.query.filter(
-        or_(
-            HeritageInfo.title.contains(query),
-            HeritageInfo.content.contains(query)
-        )
-    ).limit(10).all()
-    
-    event_results = Event.query.filter(
-        or_(
-            Event.title.contains(query),
-            Event.description.contains(query)
-        )
-    ).limit(10).all()
-    
-    resource_results = Resource.query.filter(
-        or_(
-            Resource.title.contains(query),
-            Resource.description.contains(query)
-        )
-    ).limit(10).all()
+    hits = search_index.search(query) if search_index.available else None
+    if hits is None:
+        results = legacy_search(query)
+        snippets = {}
+    else:
+        results, snippets = load_search_hits(hits)
     
     return render_template('search_results.html',
                          query=query,
-                         translation_results=translation_results,
-                         community_results=community_results,
-                         heritage_results=heritage_results,
-                         event_results=event_results,
-                         resource_results=resource_results)
+                         snippets=snippets,
+                         now=datetime.now(),
+                         translation_results=results['translation'],
+                         community_results=results['community'],
+                         heritage_results=results['heritage'],
+                         event_results=results['event'],
+                         resource_results=results['resource'])
+
+def load_search_hits(hits):
+    """Load the rows behind ranked search hits, keeping the ranking order"""
+    results = {s.kind: [] for s in SEARCHABLES}
+    snippets = {}
+    ids = {}
+    for hit in hits:
+        ids.setdefault(hit.kind, []).append(hit.ref_id)
+        snippets[(hit.kind, hit.ref_id)] = hit.body_snippet
+    
+    for kind, kind_ids in ids.items():
+        rows = {row.id: row for row in db.session.scalars(search_hits_query(BY_KIND[kind].model, kind_ids))}
+        results[kind] = [rows[i] for i in kind_ids if i in rows]
+    return results, snippets
+
+def search_hits_query(model, ids):
+    return select(model).options(undefer_group('body')).where(model.id.in_(ids))
+
+def legacy_search(query):
+    # Unranked LIKE filters, used when no full-text backend is available
+    results = {}
+    for searchable in SEARCHABLES:
+        model = searchable.model
+        columns = [getattr(model, field) for field in (searchable.title, *searchable.body)]
+        results[searchable.kind] = model.query.options(undefer_group('body')).filter(
+            or_(*[column.contains(query) for column in columns])
+        ).limit(10).all()
+    return results
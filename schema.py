@@ -0,0 +1,82 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import insert, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn
+
+logger = logging.getLogger(__name__)
+
+
+def init_database(db):
+    """Create or upgrade every table and the full-text search index"""
+    from lesson_content import render_missing
+    from search import search_index
+    from summaries import summarize_missing
+
+    db.create_all()
+    upgrade_schema(db)
+    init_versions(db)
+    rendered = render_missing(db)
+    if rendered:
+        logger.info("Pre-rendered %d lessons", rendered)
+    summarized = summarize_missing(db)
+    if summarized:
+        logger.info("Summarized %d rows", summarized)
+    search_index.create()
+
+
+def init_versions(db):
+    """A version row for each content table, so writers only ever update them"""
+    from models import CONTENT_MODELS, ContentVersion
+
+    existing = set(db.session.execute(select(ContentVersion.table_name)).scalars())
+    missing = [m.__tablename__ for m in CONTENT_MODELS if m.__tablename__ not in existing]
+    if missing:
+        now = datetime.utcnow()
+        db.session.execute(insert(ContentVersion), [
+            {'table_name': name, 'version': 0, 'modified_at': now} for name in missing
+        ])
+        db.session.commit()
+
+
+def upgrade_schema(db):
+    """Bring tables created by older versions of the app up to the models.
+
+    ``db.create_all`` only creates missing tables, so new nullable columns
+    and new indexes on existing tables are added here.  Anything more
+    involved than that needs a real migration.
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            columns = {c['name'] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in columns and column.nullable:
+                    logger.info("Adding column %s.%s", table.name, column.name)
+                    conn.execute(text('ALTER TABLE %s ADD COLUMN %s' % (
+                        conn.dialect.identifier_preparer.format_table(table),
+                        CreateColumn(column).compile(dialect=conn.dialect),
+                    )))
+                    for statement in BACKFILLS.get((table.name, column.name), ()):
+                        conn.execute(text(statement))
+            indexes = {i['name'] for i in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in indexes:
+                    logger.info("Creating index %s", index.name)
+                    try:
+                        with conn.begin_nested():
+                            index.create(conn)
+                    except IntegrityError:
+                        # Rows written before the key was unique; the app
+                        # runs without the index until they are merged
+                        logger.warning("Not creating unique index %s: %s has duplicate rows", index.name, table.name)
+
+
+# Statements run once, right after a column is added to an existing table
+BACKFILLS = {
+    ('translation', 'updated_at'): ["UPDATE translation SET updated_at = created_at"],
+}
@@ -0,0 +1,321 @@
+import logging
+import re
+import threading
+
+from markupsafe import Markup, escape
+from sqlalchemy import select, text
+
+import changefeed
+from app import db
+from database import read_engine
+from models import Translation, CommunityInfo, HeritageInfo, Event, Resource
+
+logger = logging.getLogger(__name__)
+
+# Sentinels wrapped around matched terms by the database, swapped for <mark>
+# after the snippet has been HTML-escaped
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+# Hits considered before the per-type cut, bounds the snippet work per query
+MAX_CANDIDATES = 200
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class Searchable:
+    """How one model is flattened into the shared search index"""
+
+    def __init__(self, kind, code, model, title, body):
+        self.kind = kind
+        self.code = code
+        self.model = model
+        self.title = title
+        self.body = body
+
+    def columns(self):
+        return [getattr(self.model, field) for field in ('id', self.title, *self.body)]
+
+    def document(self, obj):
+        title = getattr(obj, self.title) or ''
+        body = ' '.join(getattr(obj, field) or '' for field in self.body)
+        return title, body
+
+
+SEARCHABLES = [
+    Searchable('translation', 1, Translation, 'ukrainian', ('english', 'pronunciation')),
+    Searchable('community', 2, CommunityInfo, 'title', ('content',)),
+    Searchable('heritage', 3, HeritageInfo, 'title', ('content',)),
+    Searchable('event', 4, Event, 'title', ('description',)),
+    Searchable('resource', 5, Resource, 'title', ('description',)),
+]
+BY_KIND = {s.kind: s for s in SEARCHABLES}
+BY_MODEL = {s.model: s for s in SEARCHABLES}
+
+
+def highlight(snippet):
+    if not snippet:
+        return None
+    return Markup(str(escape(snippet)).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+class SQLiteBackend:
+    """FTS5 virtual table, ranked with bm25()"""
+
+    @staticmethod
+    def rowid(searchable, ref_id):
+        # Derived from (kind, id) so updates and deletes hit the b-tree
+        # directly instead of scanning the UNINDEXED columns
+        return ref_id * 8 + searchable.code
+
+    def create(self, conn):
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5("
+            "kind UNINDEXED, ref_id UNINDEXED, title, body, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        ))
+
+    def count(self, conn):
+        return conn.execute(text("SELECT count(*) FROM search_index")).scalar()
+
+    def clear(self, conn, searchable=None):
+        if searchable is None:
+            conn.execute(text("DELETE FROM search_index"))
+        else:
+            conn.execute(text("DELETE FROM search_index WHERE kind = :kind"), {'kind': searchable.kind})
+
+    def upsert(self, conn, searchable, rows):
+        params = [{
+            'rowid': self.rowid(searchable, ref_id),
+            'kind': searchable.kind,
+            'ref_id': ref_id,
+            'title': title,
+            'body': body,
+        } for ref_id, title, body in rows]
+        if not params:
+            return
+        conn.execute(text("DELETE FROM search_index WHERE rowid = :rowid"), params)
+        conn.execute(text(
+            "INSERT INTO search_index (rowid, kind, ref_id, title, body) "
+            "VALUES (:rowid, :kind, :ref_id, :title, :body)"
+        ), params)
+
+    def delete(self, conn, searchable, ref_id):
+        conn.execute(text("DELETE FROM search_index WHERE rowid = :rowid"),
+                     {'rowid': self.rowid(searchable, ref_id)})
+
+    def query(self, conn, terms, per_kind):
+        match = ' '.join('"%s"*' % term for term in terms)
+        return conn.execute(text(
+            "WITH hits AS ("
+            "  SELECT kind, ref_id, bm25(search_index, 0.0, 0.0, 10.0, 1.0) AS score,"
+            "         snippet(search_index, 2, :start, :end, '…', 12) AS title_snippet,"
+            "         snippet(search_index, 3, :start, :end, '…', 24) AS body_snippet"
+            "  FROM search_index WHERE search_index MATCH :match"
+            "  ORDER BY score LIMIT :candidates"
+            "), ranked AS ("
+            "  SELECT *, row_number() OVER (PARTITION BY kind ORDER BY score) AS position FROM hits"
+            ") "
+            "SELECT kind, ref_id, score, title_snippet, body_snippet FROM ranked "
+            "WHERE position <= :per_kind ORDER BY score"
+        ), {
+            'match': match, 'start': MARK_START, 'end': MARK_END,
+            'candidates': MAX_CANDIDATES, 'per_kind': per_kind,
+        }).all()
+
+
+class PostgresBackend:
+    """tsvector column with a GIN index, ranked with ts_rank_cd()"""
+
+    def create(self, conn):
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS search_documents ("
+            "  kind VARCHAR(20) NOT NULL,"
+            "  ref_id INTEGER NOT NULL,"
+            "  title TEXT,"
+            "  body TEXT,"
+            "  document tsvector GENERATED ALWAYS AS ("
+            "    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||"
+            "    setweight(to_tsvector('simple', coalesce(body, '')), 'B')"
+            "  ) STORED,"
+            "  PRIMARY KEY (kind, ref_id))"
+        ))
+        conn.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_search_documents_document "
+            "ON search_documents USING GIN (document)"
+        ))
+
+    def count(self, conn):
+        return conn.execute(text("SELECT count(*) FROM search_documents")).scalar()
+
+    def clear(self, conn, searchable=None):
+        if searchable is None:
+            conn.execute(text("DELETE FROM search_documents"))
+        else:
+            conn.execute(text("DELETE FROM search_documents WHERE kind = :kind"), {'kind': searchable.kind})
+
+    def upsert(self, conn, searchable, rows):
+        params = [{'kind': searchable.kind, 'ref_id': ref_id, 'title': title, 'body': body}
+                  for ref_id, title, body in rows]
+        if not params:
+            return
+        conn.execute(text(
+            "INSERT INTO search_documents (kind, ref_id, title, body) "
+            "VALUES (:kind, :ref_id, :title, :body) "
+            "ON CONFLICT (kind, ref_id) DO UPDATE SET title = EXCLUDED.title, body = EXCLUDED.body"
+        ), params)
+
+    def delete(self, conn, searchable, ref_id):
+        conn.execute(text("DELETE FROM search_documents WHERE kind = :kind AND ref_id = :ref_id"),
+                     {'kind': searchable.kind, 'ref_id': ref_id})
+
+    def query(self, conn, terms, per_kind):
+        tsquery = ' & '.join('%s:*' % term for term in terms)
+        options = 'StartSel=%s, StopSel=%s, MaxWords=24, MinWords=8' % (MARK_START, MARK_END)
+        return conn.execute(text(
+            "WITH hits AS ("
+            "  SELECT kind, ref_id, title, body, ts_rank_cd(document, q) AS score, q"
+            "  FROM search_documents, to_tsquery('simple', :tsquery) AS q"
+            "  WHERE document @@ q ORDER BY score DESC LIMIT :candidates"
+            "), ranked AS ("
+            "  SELECT *, row_number() OVER (PARTITION BY kind ORDER BY score DESC) AS position FROM hits"
+            ") "
+            "SELECT kind, ref_id, -score AS score,"
+            "       ts_headline('simple', title, q, :options) AS title_snippet,"
+            "       ts_headline('simple', coalesce(body, ''), q, :options) AS body_snippet "
+            "FROM ranked WHERE position <= :per_kind ORDER BY score"
+        ), {
+            'tsquery': tsquery, 'options': options,
+            'candidates': MAX_CANDIDATES, 'per_kind': per_kind,
+        }).all()
+
+
+class SearchHit:
+    def __init__(self, kind, ref_id, score, title_snippet, body_snippet):
+        self.kind = kind
+        self.ref_id = ref_id
+        self.score = score
+        self.title_snippet = highlight(title_snippet)
+        self.body_snippet = highlight(body_snippet)
+
+
+class SearchIndex:
+    """One full-text index over every searchable model.
+
+    The backend is picked from the engine dialect: FTS5 on SQLite,
+    tsvector + GIN on Postgres.  ``backend`` stays ``None`` when neither is
+    available, and callers fall back to plain LIKE filters.  Writes reach
+    the index through the change feed (see ``apply``).
+    """
+
+    def __init__(self):
+        self.backend = None
+        self._attached = False
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        if not self._attached:
+            self.attach()
+        return self.backend is not None
+
+    @staticmethod
+    def backend_for(engine):
+        backends = {'sqlite': SQLiteBackend, 'postgresql': PostgresBackend}
+        backend_class = backends.get(engine.dialect.name)
+        if backend_class is None:
+            logger.warning("Full-text search is not supported on %s", engine.dialect.name)
+            return None
+        return backend_class()
+
+    def attach(self, engine=None):
+        """Use the index if ``flask db-init`` has created it; never runs DDL"""
+        engine = engine or db.engine
+        backend = self.backend_for(engine)
+        if backend is not None:
+            try:
+                with engine.connect() as conn:
+                    backend.count(conn)
+            except Exception:
+                logger.warning("Full-text search index missing, run `flask db-init`; using LIKE search")
+                backend = None
+        self.backend = backend
+        self._attached = True
+
+    def create(self, engine=None):
+        """Create the index structures and backfill them if they are empty"""
+        engine = engine or db.engine
+        backend = self.backend_for(engine)
+        if backend is None:
+            return
+        try:
+            with engine.begin() as conn:
+                backend.create(conn)
+                empty = backend.count(conn) == 0
+        except Exception:
+            logger.exception("Could not create the full-text search index")
+            return
+        self.backend = backend
+        self._attached = True
+        if empty:
+            self.rebuild(engine)
+
+    def rebuild(self, engine=None, searchables=SEARCHABLES):
+        engine = engine or db.engine
+        with self._lock, engine.begin() as conn:
+            for searchable in searchables:
+                self.backend.clear(conn, searchable)
+                # Walk the table in id order a batch at a time on the same
+                # connection, so memory stays flat and SQLite sees one writer
+                last_id = 0
+                while True:
+                    rows = conn.execute(
+                        select(*searchable.columns())
+                        .where(searchable.model.id > last_id)
+                        .order_by(searchable.model.id)
+                        .limit(1000)
+                    ).all()
+                    if not rows:
+                        break
+                    self.backend.upsert(conn, searchable, [(row.id, *searchable.document(row)) for row in rows])
+                    last_id = rows[-1].id
+
+    def apply(self, records):
+        """Change-feed consumer: reindex exactly the rows in ``records``"""
+        if not self.available:
+            return
+        reload = {BY_MODEL[r.model] for r in records if r.op == changefeed.RELOAD}
+        if reload:
+            self.rebuild(searchables=[s for s in SEARCHABLES if s in reload])
+        records = [r for r in records if BY_MODEL[r.model] not in reload]
+        if not records:
+            return
+        with self._lock, db.engine.begin() as conn:
+            for record in records:
+                searchable = BY_MODEL[record.model]
+                if record.op == changefeed.DELETE:
+                    self.backend.delete(conn, searchable, record.pk)
+                    continue
+                fields = (searchable.title, *searchable.body)
+                if record.op == changefeed.UPDATE and not any(f in record.changes for f in fields):
+                    continue
+                row = record.row
+                if not all(f in record.values for f in fields):
+                    row = conn.execute(
+                        select(*searchable.columns()).where(searchable.model.id == record.pk)
+                    ).first()
+                    if row is None:
+                        continue
+                self.backend.upsert(conn, searchable, [(record.pk, *searchable.document(row))])
+
+    def search(self, query, per_kind=10):
+        """Ranked hits for ``query``, at most ``per_kind`` of each type, best first"""
+        terms = [t.lower() for t in TOKEN_RE.findall(query)]
+        if not terms or not self.available:
+            return []
+        with read_engine(db).connect() as conn:
+            rows = self.backend.query(conn, terms, per_kind)
+        return [SearchHit(*row) for row in rows]
+
+
+search_index = SearchIndex()
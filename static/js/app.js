@@ -400,7 +400,7 @@ function shareContent(title, text, url = window.location.href) {
 function initializeServiceWorker() {
     if ('serviceWorker' in navigator) {
         window.addEventListener('load', function() {
-            navigator.serviceWorker.register('/static/sw.js')
+            navigator.serviceWorker.register('/sw.js')
                 .then(function(registration) {
                     console.log('ServiceWorker registration successful');
                     
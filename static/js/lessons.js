@@ -66,6 +66,109 @@ function loadUserProgress() {
             userProgress = {};
         }
     }
+    
+    // Send anything recorded offline, then pick up progress from other devices
+    flushProgressQueue();
+    syncServerProgress();
+    window.addEventListener('online', () => flushProgressQueue());
+}
+
+// ===== SERVER SYNC =====
+const PROGRESS_QUEUE_KEY = 'lessonProgressQueue';
+const PROGRESS_BATCH_SIZE = 500;
+// One batch at a time: time and practice counts add up on the server, so
+// overlapping flushes of the same queue would count events twice
+let progressFlushInFlight = false;
+
+function newId() {
+    return window.crypto && crypto.randomUUID ?
+        crypto.randomUUID() :
+        Date.now().toString(36) + Math.random().toString(36).slice(2);
+}
+
+function getLearnerId() {
+    // Anonymous id tying this browser's progress to the server copy
+    let learnerId = localStorage.getItem('learnerId');
+    if (!learnerId) {
+        learnerId = newId();
+        localStorage.setItem('learnerId', learnerId);
+    }
+    return learnerId;
+}
+
+function loadProgressQueue() {
+    try {
+        return JSON.parse(localStorage.getItem(PROGRESS_QUEUE_KEY)) || [];
+    } catch (error) {
+        return [];
+    }
+}
+
+function queueProgressEvent(event) {
+    const queue = loadProgressQueue();
+    // The id lets the server skip events it already counted when a batch
+    // is resent after its response was lost
+    queue.push(Object.assign({ id: newId(), at: new Date().toISOString() }, event));
+    try {
+        localStorage.setItem(PROGRESS_QUEUE_KEY, JSON.stringify(queue));
+    } catch (error) {
+        console.error('Error queueing progress:', error);
+    }
+}
+
+function flushProgressQueue(keepalive = false) {
+    if (progressFlushInFlight) {
+        return;
+    }
+    const events = loadProgressQueue().slice(0, PROGRESS_BATCH_SIZE);
+    if (events.length === 0 || !navigator.onLine) {
+        return;
+    }
+    
+    progressFlushInFlight = true;
+    fetch('/api/progress', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json', 'X-Learner-Id': getLearnerId() },
+        body: JSON.stringify({ events: events }),
+        keepalive: keepalive
+    })
+        .then(response => {
+            if (!response.ok && response.status !== 400) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            // Rejected events are dropped too; resending them cannot succeed.
+            // Events queued meanwhile were appended after the ones sent.
+            const remaining = loadProgressQueue().slice(events.length);
+            localStorage.setItem(PROGRESS_QUEUE_KEY, JSON.stringify(remaining));
+            progressFlushInFlight = false;
+            if (remaining.length > 0) {
+                flushProgressQueue();
+            }
+        })
+        .catch(error => {
+            progressFlushInFlight = false;
+            console.warn('Progress sync postponed:', error);
+        });
+}
+
+function syncServerProgress() {
+    fetch('/api/progress', { headers: { 'X-Learner-Id': getLearnerId() } })
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            if (!data) return;
+            Object.entries(data.lessons).forEach(([lessonId, server]) => {
+                const local = userProgress[lessonId] || (userProgress[lessonId] = {});
+                local.level = local.level || server.level;
+                if (server.completed && !local.completed) {
+                    local.completed = true;
+                    local.completedAt = server.completed_at;
+                }
+                local.timeSpent = Math.max(local.timeSpent || 0, server.time_spent_ms);
+            });
+            saveUserProgress();
+            updateProgressDisplay();
+        })
+        .catch(error => console.warn('Could not load saved progress:', error));
 }
 
 function saveUserProgress() {
@@ -158,6 +261,8 @@ function markLessonCompleted() {
         userProgress[lessonId].level = lessonLevel;
         
         saveUserProgress();
+        queueProgressEvent({ type: 'lesson_completed', lesson_id: Number(lessonId) });
+        flushProgressQueue();
         
         // Update UI
         const completeBtn = document.getElementById('completeLesson');
@@ -192,6 +297,9 @@ function recordTimeSpent(timeSpent) {
         
         userProgress[lessonId].timeSpent += timeSpent;
         saveUserProgress();
+        // Runs while the page unloads, so the request must outlive it
+        queueProgressEvent({ type: 'time_spent', lesson_id: Number(lessonId), ms: Math.round(timeSpent) });
+        flushProgressQueue(true);
     }
 }
 
@@ -408,10 +516,10 @@ function startListening(expectedPhrase, callback) {
         const spokenText = event.results[0][0].transcript.toLowerCase();
         const expected = expectedPhrase.toLowerCase();
         
-        const similarity = calculateSimilarity(spokenText, expected);
-        showPracticeFeedback(spokenText, expectedPhrase, similarity);
-        
-        setTimeout(() => callback(similarity > 0.6), 2000);
+        scoreSpeech(spokenText, expected).then(similarity => {
+            showPracticeFeedback(spokenText, expectedPhrase, similarity);
+            setTimeout(() => callback(similarity > 0.6), 2000);
+        });
     };
     
     recognition.onerror = function(event) {
@@ -423,6 +531,21 @@ function startListening(expectedPhrase, callback) {
     recognition.start();
 }
 
+function scoreSpeech(spoken, expected) {
+    // Sound-aware scoring on the server; word overlap when offline
+    return fetch('/api/practice/score', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ attempts: [{ transcript: spoken, expected: expected }] })
+    })
+        .then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            return response.json();
+        })
+        .then(data => data.results[0].score)
+        .catch(() => calculateSimilarity(spoken, expected));
+}
+
 function calculateSimilarity(text1, text2) {
     const words1 = text1.split(' ').filter(w => w.length > 2);
     const words2 = text2.split(' ').filter(w => w.length > 2);
@@ -813,6 +936,11 @@ function recordPracticeSession(type, score = null) {
     });
     
     saveUserProgress();
+    
+    if (lessonId !== 'general') {
+        queueProgressEvent({ type: 'practice', lesson_id: Number(lessonId), score: score });
+        flushProgressQueue();
+    }
 }
 
 // ===== UTILITY FUNCTIONS =====
@@ -123,6 +123,9 @@ function checkURLParameters() {
 }
 
 // ===== PHRASE LOADING =====
+const PHRASE_PAGE_SIZE = 200;
+let phraseLoadId = 0;
+
 function loadPhrases() {
     showPhraseLoading(true);
     
@@ -138,10 +141,23 @@ function loadPhrases() {
     if (searchTerm) {
         params.append('search', searchTerm);
     }
+    params.append('order', 'category');
+    params.append('limit', PHRASE_PAGE_SIZE);
     
-    const url = `/api/translations?${params.toString()}`;
+    // Pages arrive one at a time; a newer load abandons an older one
+    const loadId = ++phraseLoadId;
+    currentPhrases = [];
+    filteredPhrases = [];
+    loadPhrasePage(params, null, loadId);
+}
+
+function loadPhrasePage(params, cursor, loadId) {
+    const pageParams = new URLSearchParams(params);
+    if (cursor) {
+        pageParams.append('cursor', cursor);
+    }
     
-    fetch(url)
+    fetch(`/api/translations?${pageParams.toString()}`)
         .then(response => {
             if (!response.ok) {
                 throw new Error(`HTTP error! status: ${response.status}`);
@@ -149,15 +165,22 @@ function loadPhrases() {
             return response.json();
         })
         .then(data => {
-            currentPhrases = data;
-            filteredPhrases = data;
-            displayPhrases(data);
+            if (loadId !== phraseLoadId) return;
+            currentPhrases = currentPhrases.concat(data.items);
+            filteredPhrases = currentPhrases;
+            displayPhrases(currentPhrases);
             showPhraseLoading(false);
+            if (data.next_cursor) {
+                loadPhrasePage(params, data.next_cursor, loadId);
+            }
         })
         .catch(error => {
+            if (loadId !== phraseLoadId) return;
             console.error('Error loading phrases:', error);
             showPhraseLoading(false);
-            showPhraseError('Failed to load phrases. Please refresh the page.');
+            if (currentPhrases.length === 0) {
+                showPhraseError('Failed to load phrases. Please refresh the page.');
+            }
         });
 }
 
@@ -374,6 +397,62 @@ function translateText() {
     
     showTranslatingIndicator(true);
     
+    // Ask the server-side phrase index first, fall back to the loaded phrases offline
+    fetch(`/api/translate?q=${encodeURIComponent(text)}`)
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(result => showServerTranslation(result, text))
+        .catch(() => translateTextLocally(text));
+}
+
+function showServerTranslation(result, text) {
+    const englishText = document.getElementById('englishText');
+    const reverse = result.direction === 'en-uk';
+    const match = result.exact || result.best_partial;
+    
+    if (!match) {
+        if (result.suggestions && result.suggestions.length) {
+            showSuggestedTranslation(result.suggestions);
+        } else {
+            translateTextLocally(text);
+        }
+        return;
+    }
+    
+    englishText.value = reverse ? match.ukrainian : match.english;
+    enableTranslationButtons();
+    showTranslatingIndicator(false);
+    
+    if (reverse) {
+        showToast(`English → Ukrainian: "${match.english}" → "${match.ukrainian}"`, result.exact ? 'success' : 'info');
+    } else if (!result.exact) {
+        showToast(`Ukrainian → English: "${match.ukrainian}" → "${match.english}"`, 'info');
+    }
+}
+
+function showSuggestedTranslation(suggestions) {
+    const englishText = document.getElementById('englishText');
+    const best = suggestions[0];
+    // A misspelled English phrase translates to Ukrainian; anything matched
+    // by sound (Cyrillic typo or Latin transliteration) translates to English
+    const reverse = best.matched === 'english';
+    
+    englishText.value = reverse ? best.ukrainian : best.english;
+    enableTranslationButtons();
+    showTranslatingIndicator(false);
+    
+    const others = suggestions.slice(1).map(s => `"${s.matched === 'english' ? s.english : s.ukrainian}"`);
+    const alternatives = others.length ? ` Also: ${others.join(', ')}` : '';
+    showToast(`Did you mean "${reverse ? best.english : best.ukrainian}"?${alternatives}`, 'info');
+}
+
+function translateTextLocally(text) {
+    const englishText = document.getElementById('englishText');
+    
     // Check if input is Cyrillic (Ukrainian) or Latin (English)
     const isCyrillic = /[\u0400-\u04FF]/.test(text);
     const isLatin = /[A-Za-z]/.test(text);
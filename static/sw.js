@@ -1,17 +1,27 @@
 // Ukrainian Winnipeg App - Service Worker
 
+// Served from /sw.js with the asset manifest prepended: the build's
+// version and the (content-hashed) URLs of the static files
+const ASSET_MANIFEST = self.ASSET_MANIFEST || {
+  version: 'dev',
+  assets: [
+    '/static/css/styles.css',
+    '/static/js/app.js',
+    '/static/js/translator.js',
+    '/static/js/lessons.js',
+    '/static/manifest.json'
+  ]
+};
+
 const CACHE_NAME = 'ukrainian-winnipeg-v1';
-const STATIC_CACHE_NAME = 'ukrainian-winnipeg-static-v1';
+// A new build gets a new cache; activation deletes the old one
+const STATIC_CACHE_NAME = 'ukrainian-winnipeg-static-' + ASSET_MANIFEST.version;
 const API_CACHE_NAME = 'ukrainian-winnipeg-api-v1';
 
 // Files to cache for offline functionality
 const STATIC_ASSETS = [
   '/',
-  '/static/css/styles.css',
-  '/static/js/app.js',
-  '/static/js/translator.js',
-  '/static/js/lessons.js',
-  '/static/manifest.json',
+  ...ASSET_MANIFEST.assets,
   '/translator',
   '/lessons',
   '/community',
@@ -29,6 +39,11 @@ const API_ENDPOINTS = [
   '/api/translations'
 ];
 
+// Offline phrasebook: full bundle downloaded once, then kept current with deltas
+const PHRASEBOOK_BUNDLE_URL = '/api/translations/bundle';
+const PHRASEBOOK_DELTA_URL = '/api/translations/delta';
+const PHRASEBOOK_CACHE_KEY = '/offline/phrasebook.json';
+
 // URLs that should always be fetched from network
 const NETWORK_ONLY = [
   '/admin',
@@ -53,7 +68,10 @@ self.addEventListener('install', function(event) {
       caches.open(API_CACHE_NAME).then(function(cache) {
         console.log('Service Worker: Preparing API cache...');
         return Promise.resolve();
-      })
+      }),
+      
+      // Download the offline phrasebook (failure must not block installation)
+      syncTranslations()
     ]).then(function() {
       console.log('Service Worker: Installation complete');
       // Take control immediately
@@ -146,34 +164,9 @@ function handleAPIRequest(request) {
           return cachedResponse;
         }
         
-        // Return offline API response for translations
-        if (url.pathname === '/api/translations') {
-          return new Response(JSON.stringify([
-            {
-              id: 1,
-              ukrainian: "Допоможіть!",
-              english: "Help!",
-              pronunciation: "Do-po-mo-zheet",
-              category: "emergency"
-            },
-            {
-              id: 2,
-              ukrainian: "Дякую",
-              english: "Thank you",
-              pronunciation: "Dya-ku-yu",
-              category: "greetings"
-            },
-            {
-              id: 3,
-              ukrainian: "Привіт",
-              english: "Hello",
-              pronunciation: "Pry-veet",
-              category: "greetings"
-            }
-          ]), {
-            headers: { 'Content-Type': 'application/json' },
-            status: 200
-          });
+        // Answer translation requests from the offline phrasebook
+        if (url.pathname === '/api/translations' || url.pathname === '/api/translate') {
+          return offlineTranslationResponse(url);
         }
         
         throw new Error('No cached response available');
@@ -444,26 +437,177 @@ self.addEventListener('sync', function(event) {
 });
 
 function syncTranslations() {
-  // Sync translations when connection is restored
-  return fetch('/api/translations')
+  // Fetch only what changed since the stored phrasebook, or the whole bundle once
+  return loadPhrasebook()
+    .then(function(phrasebook) {
+      if (!phrasebook) {
+        return downloadPhrasebook();
+      }
+      return fetch(`${PHRASEBOOK_DELTA_URL}?since=${phrasebook.version}`)
+        .then(function(response) {
+          if (response.status === 400) {
+            // Stored version unknown to the server (e.g. a restored database)
+            return downloadPhrasebook();
+          }
+          if (!response.ok) {
+            throw new Error('Sync failed');
+          }
+          return response.json().then(function(delta) {
+            return storePhrasebook(applyPhrasebookDelta(phrasebook, delta));
+          });
+        });
+    })
+    .catch(function(error) {
+      console.error('Service Worker: Translation sync failed', error);
+    });
+}
+
+function downloadPhrasebook() {
+  return fetch(PHRASEBOOK_BUNDLE_URL)
     .then(function(response) {
       if (response.ok) {
         return response.json();
       }
-      throw new Error('Sync failed');
+      throw new Error('Phrasebook download failed');
     })
-    .then(function(data) {
-      return caches.open(API_CACHE_NAME).then(function(cache) {
-        return cache.put('/api/translations', new Response(JSON.stringify(data), {
-          headers: { 'Content-Type': 'application/json' }
-        }));
-      });
+    .then(storePhrasebook);
+}
+
+function loadPhrasebook() {
+  return caches.open(API_CACHE_NAME)
+    .then(function(cache) {
+      return cache.match(PHRASEBOOK_CACHE_KEY);
     })
-    .catch(function(error) {
-      console.error('Service Worker: Translation sync failed', error);
+    .then(function(response) {
+      return response ? response.json() : null;
     });
 }
 
+function storePhrasebook(phrasebook) {
+  return caches.open(API_CACHE_NAME).then(function(cache) {
+    return cache.put(PHRASEBOOK_CACHE_KEY, new Response(JSON.stringify(phrasebook), {
+      headers: { 'Content-Type': 'application/json' }
+    }));
+  });
+}
+
+function phrasebookRows(phrasebook) {
+  const rows = [];
+  for (let i = 0; i < phrasebook.count; i++) {
+    const row = {};
+    phrasebook.fields.forEach(function(field) {
+      row[field] = phrasebook.columns[field][i];
+    });
+    rows.push(row);
+  }
+  return rows;
+}
+
+function normalizePhrase(text) {
+  // Close to the server's normalize(); used only for rows merged from deltas
+  return (text || '')
+    .toLowerCase()
+    .replace(/[’ʼ‘`´]/g, "'")
+    .replace(/[^\p{L}\p{N}'\s]/gu, ' ')
+    .split(/\s+/)
+    .filter(Boolean)
+    .join(' ');
+}
+
+function applyPhrasebookDelta(phrasebook, delta) {
+  const deleted = new Set(delta.deleted);
+  const changed = new Map(delta.changed.map(function(row) { return [row.id, row]; }));
+  
+  const rows = phrasebookRows(phrasebook)
+    .filter(function(row) { return !deleted.has(row.id) && !changed.has(row.id); })
+    .concat(delta.changed);
+  rows.sort(function(a, b) { return a.id - b.id; });
+  
+  const columns = {};
+  phrasebook.fields.forEach(function(field) { columns[field] = []; });
+  const index = {};
+  rows.forEach(function(row, position) {
+    phrasebook.fields.forEach(function(field) {
+      columns[field].push(row[field] === undefined ? null : row[field]);
+    });
+    new Set([normalizePhrase(row.ukrainian), normalizePhrase(row.english)]).forEach(function(key) {
+      if (key) {
+        (index[key] = index[key] || []).push(position);
+      }
+    });
+  });
+  
+  return {
+    version: delta.version,
+    count: rows.length,
+    fields: phrasebook.fields,
+    columns: columns,
+    index: index
+  };
+}
+
+function offlineTranslationResponse(url) {
+  return loadPhrasebook().then(function(phrasebook) {
+    let rows = phrasebook ? phrasebookRows(phrasebook) : FALLBACK_PHRASES;
+    let body;
+    
+    if (url.pathname === '/api/translate') {
+      const query = url.searchParams.get('q') || '';
+      const positions = phrasebook ? (phrasebook.index[normalizePhrase(query)] || []) : [];
+      const exact = positions.length ? rows[positions[0]] : null;
+      body = {
+        query: query,
+        direction: /[\u0400-\u04FF]/.test(query) ? 'uk-en' : 'en-uk',
+        exact: exact,
+        best_partial: null,
+        partial: []
+      };
+    } else {
+      const category = url.searchParams.get('category');
+      const search = (url.searchParams.get('search') || '').toLowerCase();
+      if (category && category !== 'all') {
+        rows = rows.filter(function(row) { return row.category === category; });
+      }
+      if (search) {
+        rows = rows.filter(function(row) {
+          return row.ukrainian.toLowerCase().includes(search) || row.english.toLowerCase().includes(search);
+        });
+      }
+      body = url.searchParams.has('limit') ? { items: rows, next_cursor: null } : rows;
+    }
+    
+    return new Response(JSON.stringify(body), {
+      headers: { 'Content-Type': 'application/json' },
+      status: 200
+    });
+  });
+}
+
+// Last resort when no phrasebook has been downloaded yet
+const FALLBACK_PHRASES = [
+  {
+    id: 1,
+    ukrainian: "Допоможіть!",
+    english: "Help!",
+    pronunciation: "Do-po-mo-zheet",
+    category: "emergency"
+  },
+  {
+    id: 2,
+    ukrainian: "Дякую",
+    english: "Thank you",
+    pronunciation: "Dya-ku-yu",
+    category: "greetings"
+  },
+  {
+    id: 3,
+    ukrainian: "Привіт",
+    english: "Hello",
+    pronunciation: "Pry-veet",
+    category: "greetings"
+  }
+];
+
 // ===== PUSH NOTIFICATIONS =====
 self.addEventListener('push', function(event) {
   if (!event.data) {
@@ -0,0 +1,62 @@
+import re
+from html import unescape
+
+from sqlalchemy import event, inspect, select, update
+
+from models import CommunityInfo, HeritageInfo, Event, Resource
+
+SUMMARY_LENGTH = 150
+
+# The body column each model's summary is cut from
+SOURCES = {
+    CommunityInfo: 'content',
+    HeritageInfo: 'content',
+    Event: 'description',
+    Resource: 'description',
+}
+
+TAG = re.compile(r'<[^>]*>')
+WHITESPACE = re.compile(r'\s+')
+
+
+def summarize(text, length=SUMMARY_LENGTH):
+    """Plain-text preview of a body, cut at a word boundary"""
+    if not text:
+        return None
+    text = WHITESPACE.sub(' ', unescape(TAG.sub(' ', text))).strip()
+    if len(text) <= length:
+        return text
+    cut = text.rfind(' ', 0, length + 1)
+    return text[:cut if cut > length // 2 else length].rstrip(' ,.;:') + '...'
+
+
+def summary_columns(model):
+    """Importer hook adding the summary to rows that carry the body"""
+    source = SOURCES[model]
+    return lambda row: {'summary': summarize(row[source])} if source in row else {}
+
+
+def _summarize_row(mapper, connection, target):
+    source = SOURCES[mapper.class_]
+    state = inspect(target)
+    if state.has_identity and not state.attrs[source].history.has_changes():
+        return
+    target.summary = summarize(getattr(target, source))
+
+
+for _model in SOURCES:
+    event.listen(_model, 'before_insert', _summarize_row)
+    event.listen(_model, 'before_update', _summarize_row)
+
+
+def summarize_missing(db):
+    """Fill in summaries for rows stored before they existed"""
+    count = 0
+    with db.engine.begin() as conn:
+        for model, source in SOURCES.items():
+            body = getattr(model, source)
+            rows = conn.execute(select(model.id, body).where(model.summary.is_(None), body.isnot(None))).all()
+            for row in rows:
+                conn.execute(update(model).where(model.id == row.id).values(summary=summarize(row[1])))
+            count += len(rows)
+    return count
@@ -0,0 +1,231 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from flask import request
+from sqlalchemy import select
+
+from app import db
+from changefeed import ChangeRecord
+from models import Event
+
+logger = logging.getLogger(__name__)
+
+PAST_EVENTS = 10
+
+# Events have no end time; calendars get the same two hours as "Add to Calendar"
+EVENT_DURATION = timedelta(hours=2)
+
+# Published to rollover listeners when an event moves from upcoming to past
+ROLLOVER = 'rollover'
+
+# Long timers are re-armed in steps so clock changes are picked up
+MAX_TIMER_SECONDS = 3600
+
+
+def upcoming_query(now):
+    return select(Event.__table__).where(Event.date >= now).order_by(Event.date)
+
+
+def past_query(now, limit):
+    return select(Event.__table__).where(Event.date < now).order_by(Event.date.desc()).limit(limit)
+
+
+class EventTimeline:
+    """Upcoming events and the most recent past ones, sorted, in memory.
+
+    Event dates are naive local times like everywhere else in the app.
+    Events move from upcoming to past when their date passes, either from
+    a timer armed for the next event or from the check run before each
+    request (timers do not survive a fork).  Listeners hear about every
+    rollover so pages and validators built from the timeline move on too.
+    Writes to Event drop the window and it is reloaded on next use.
+    """
+
+    def __init__(self, past_limit=PAST_EVENTS):
+        self.past_limit = past_limit
+        self.version = 0
+        self.loaded = False
+        self._upcoming = []
+        self._past = []
+        self._listeners = []
+        self._timer = None
+        self._ics = None
+        self._lock = threading.RLock()
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+
+    def subscribe(self, listener):
+        """Call ``listener(records)`` with an Event record after each rollover"""
+        self._listeners.append(listener)
+
+    def load(self):
+        now = datetime.now()
+        upcoming = db.session.execute(upcoming_query(now)).all()
+        past = db.session.execute(past_query(now, self.past_limit)).all()
+        with self._lock:
+            self._upcoming = [SimpleNamespace(**row._mapping) for row in upcoming]
+            self._past = [SimpleNamespace(**row._mapping) for row in past]
+            self.version += 1
+            self.loaded = True
+            self._schedule()
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+
+    def apply(self, records):
+        """Change-feed consumer for Event writes"""
+        with self._lock:
+            self.loaded = False
+            self._cancel()
+
+    def boundary(self):
+        """Date of the next upcoming event; it moves on with every rollover"""
+        self.ensure_loaded()
+        self.tick()
+        with self._lock:
+            return self._upcoming[0].date.isoformat() if self._upcoming else ''
+
+    def upcoming(self, limit=None):
+        self.ensure_loaded()
+        self.tick()
+        with self._lock:
+            return self._upcoming[:limit]
+
+    def past(self):
+        self.ensure_loaded()
+        self.tick()
+        with self._lock:
+            return list(self._past)
+
+    def tick(self, now=None):
+        """Move every upcoming event whose date has passed into the past window"""
+        now = now or datetime.now()
+        with self._lock:
+            if not self.loaded or not self._upcoming or self._upcoming[0].date >= now:
+                return
+            moved = 0
+            while self._upcoming and self._upcoming[0].date < now:
+                self._past.insert(0, self._upcoming.pop(0))
+                moved += 1
+            del self._past[self.past_limit:]
+            self.version += 1
+            self._schedule()
+        logger.info("Rolled %d events into the past", moved)
+        for listener in list(self._listeners):
+            try:
+                listener([ChangeRecord(Event, ROLLOVER)])
+            except Exception:
+                logger.exception("Rollover listener %r failed", listener)
+
+    def _before_request(self):
+        # One comparison per request; only the first request after an
+        # event starts does any work
+        if request.endpoint != 'static':
+            self.tick()
+
+    def _schedule(self):
+        self._cancel()
+        if not self._upcoming:
+            return
+        delay = (self._upcoming[0].date - datetime.now()).total_seconds()
+        # Strictly after the event's date, so the comparison in tick() holds
+        delay = min(max(delay, 0) + 0.001, MAX_TIMER_SECONDS)
+        self._timer = threading.Timer(delay, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            if not self.loaded:
+                return
+            self._timer = None
+            if self._upcoming and self._upcoming[0].date >= datetime.now():
+                # Early wake-up from the step limit; wait some more
+                self._schedule()
+                return
+        self.tick()
+
+    def after_fork(self):
+        """Re-arm the rollover timer in a forked worker; threads do not survive a fork"""
+        with self._lock:
+            self._timer = None
+            if self.loaded:
+                self._schedule()
+
+    def _cancel(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def ics(self, host):
+        """The timeline as an iCalendar feed, rebuilt only when the timeline changes"""
+        self.ensure_loaded()
+        self.tick()
+        with self._lock:
+            if self._ics is None or self._ics[0] != (self.version, host):
+                events = sorted(self._past + self._upcoming, key=lambda e: e.date)
+                self._ics = ((self.version, host), render_ics(events, host))
+            return self._ics[1]
+
+
+def ics_text(value):
+    return (value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def ics_fold(line):
+    """Split a content line into 75-octet chunks (RFC 5545 section 3.1)"""
+    data = line.encode()
+    chunks = []
+    while len(data) > 75:
+        cut = 75 if not chunks else 74
+        # Never split a multi-byte character
+        while cut and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        chunks.append(data[:cut])
+        data = data[cut:]
+    chunks.append(data)
+    return b'\r\n '.join(chunks)
+
+
+def render_ics(events, host):
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Ukrainian Winnipeg//Community Events//EN',
+        'CALSCALE:GREGORIAN',
+        'X-WR-CALNAME:Ukrainian Winnipeg Community Events',
+    ]
+    for event in events:
+        description = '\n'.join(part for part in (
+            event.description,
+            'Organized by %s' % event.organizer if event.organizer else None,
+            event.contact_info,
+        ) if part)
+        lines += [
+            'BEGIN:VEVENT',
+            'UID:event-%d@%s' % (event.id, host),
+            'DTSTAMP:' + stamp,
+            'DTSTART:' + event.date.strftime('%Y%m%dT%H%M%S'),
+            'DTEND:' + (event.date + EVENT_DURATION).strftime('%Y%m%dT%H%M%S'),
+            'SUMMARY:' + ics_text(event.title),
+        ]
+        if description:
+            lines.append('DESCRIPTION:' + ics_text(description))
+        if event.location:
+            lines.append('LOCATION:' + ics_text(event.location))
+        if event.category:
+            lines.append('CATEGORIES:' + ics_text(event.category))
+        lines.append('END:VEVENT')
+    lines.append('END:VCALENDAR')
+    return b''.join(ics_fold(line) + b'\r\n' for line in lines)
+
+
+timeline = EventTimeline()
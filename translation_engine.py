@@ -0,0 +1,280 @@
+import heapq
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from types import SimpleNamespace
+
+import changefeed
+
+# All the ways people type the Ukrainian apostrophe (п'ять, м'ясо, ...)
+APOSTROPHES = "’ʼ‘`´ʹ′"
+
+# Latin look-alikes that sneak into Cyrillic words from mixed keyboard layouts
+CYRILLIC_HOMOGLYPHS = str.maketrans({
+    'i': 'і', 'ï': 'ї', 'e': 'е', 'o': 'о', 'a': 'а', 'c': 'с', 'p': 'р', 'x': 'х', 'y': 'у',
+})
+
+CYRILLIC_RE = re.compile(r'[Ѐ-ӿ]')
+LATIN_RE = re.compile(r'[A-Za-z]')
+
+NGRAM_SIZE = 3
+
+# Longest sentence we try to split into known phrases
+MAX_QUERY_WORDS = 12
+
+
+def normalize(text):
+    """Fold a phrase to the form used as an index key"""
+    if not text:
+        return ''
+    text = unicodedata.normalize('NFC', text).casefold()
+    for mark in APOSTROPHES:
+        text = text.replace(mark, "'")
+    # Drop punctuation but keep the apostrophe, it is part of Ukrainian words
+    text = ''.join(
+        ' ' if unicodedata.category(ch).startswith('P') and ch != "'" else ch
+        for ch in text
+    )
+    words = []
+    for word in text.split():
+        if CYRILLIC_RE.search(word):
+            word = word.translate(CYRILLIC_HOMOGLYPHS)
+        words.append(word.strip("'"))
+    return ' '.join(w for w in words if w)
+
+
+def ngrams(key, size=NGRAM_SIZE, pad=True):
+    if pad:
+        key = f' {key} '
+    return {key[i:i + size] for i in range(len(key) - size + 1)}
+
+
+INDEXED_FIELDS = ('ukrainian', 'english', 'pronunciation', 'category', 'subcategory')
+
+
+def serialize(translation):
+    return {
+        'id': translation.id,
+        'ukrainian': translation.ukrainian,
+        'english': translation.english,
+        'pronunciation': translation.pronunciation,
+        'category': translation.category,
+        'subcategory': translation.subcategory,
+    }
+
+
+class _SideIndex:
+    """Exact, n-gram and prefix lookups over one language column"""
+
+    def __init__(self):
+        self.exact = {}
+        self.grams = {}
+        self.keys = {}
+        self._sorted = None
+
+    def add(self, entry_id, key):
+        if not key:
+            return
+        self.keys[entry_id] = key
+        self.exact.setdefault(key, []).append(entry_id)
+        for gram in ngrams(key):
+            self.grams.setdefault(gram, set()).add(entry_id)
+        self._sorted = None
+
+    def remove(self, entry_id):
+        key = self.keys.pop(entry_id, None)
+        if key is None:
+            return
+        ids = self.exact.get(key, [])
+        if entry_id in ids:
+            ids.remove(entry_id)
+        if not ids:
+            self.exact.pop(key, None)
+        for gram in ngrams(key):
+            bucket = self.grams.get(gram)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self.grams[gram]
+        self._sorted = None
+
+    def sorted_keys(self):
+        if self._sorted is None:
+            self._sorted = sorted(self.exact)
+        return self._sorted
+
+    def containing(self, key):
+        """Ids whose key contains ``key`` as a substring"""
+        if len(key) >= NGRAM_SIZE:
+            grams = ngrams(key, pad=False)
+        elif len(key) + 1 >= NGRAM_SIZE:
+            # Too short for a full gram: match words starting with the query
+            grams = ngrams(' ' + key, pad=False)
+        else:
+            return self.prefixed(key)
+        candidates = None
+        # Rarest grams first so the intersection shrinks quickly
+        for gram in sorted(grams, key=lambda g: len(self.grams.get(g, ()))):
+            bucket = self.grams.get(gram)
+            if not bucket:
+                return set()
+            candidates = set(bucket) if candidates is None else candidates & bucket
+            if not candidates:
+                return candidates
+        return {i for i in candidates if key in self.keys[i]}
+
+    def prefixed(self, key, limit=50):
+        keys = self.sorted_keys()
+        found = set()
+        pos = bisect_left(keys, key)
+        while pos < len(keys) and keys[pos].startswith(key) and len(found) < limit:
+            found.update(self.exact[keys[pos]])
+            pos += 1
+        return found
+
+    def contained_in(self, key):
+        """Ids whose whole key appears inside ``key`` (the query is a longer sentence)"""
+        words = key.split()[:MAX_QUERY_WORDS]
+        found = set()
+        for start in range(len(words)):
+            for end in range(start + 1, len(words) + 1):
+                found.update(self.exact.get(' '.join(words[start:end]), ()))
+        return found
+
+
+class TranslationIndex:
+    """In-memory phrase index over the Translation table.
+
+    Built from the database on first use and then kept up to date from the
+    change feed, so lookups never scan the table.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.entries = {}
+        self.ukrainian = _SideIndex()
+        self.english = _SideIndex()
+        self.loaded = False
+
+    def __len__(self):
+        return len(self.entries)
+
+    def load(self, translations):
+        with self._lock:
+            self._reset()
+            for translation in translations:
+                self._add(translation)
+            self.loaded = True
+
+    def load_from_db(self):
+        from models import Translation
+        self.load(Translation.query.yield_per(1000))
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load_from_db()
+
+    def add(self, translation):
+        with self._lock:
+            self._remove(translation.id)
+            self._add(translation)
+
+    def remove(self, translation_id):
+        with self._lock:
+            self._remove(translation_id)
+
+    def apply(self, records):
+        """Change-feed consumer for Translation writes"""
+        if not self.loaded:
+            # Nothing built yet; the first lookup loads current rows
+            return
+        if any(r.op == changefeed.RELOAD for r in records):
+            # Rebuilt on next use; the committing session can no longer query
+            self.loaded = False
+            return
+        with self._lock:
+            for record in records:
+                if record.op == changefeed.DELETE:
+                    self._remove(record.pk)
+                elif record.op == changefeed.INSERT or any(f in record.changes for f in INDEXED_FIELDS):
+                    entry = dict.fromkeys(INDEXED_FIELDS)
+                    entry.update(self.entries.get(record.pk, {}), **record.values)
+                    self._remove(record.pk)
+                    self._add(SimpleNamespace(**entry))
+
+    def _add(self, translation):
+        entry = serialize(translation)
+        self.entries[entry['id']] = entry
+        self.ukrainian.add(entry['id'], normalize(entry['ukrainian']))
+        self.english.add(entry['id'], normalize(entry['english']))
+
+    def _remove(self, translation_id):
+        if self.entries.pop(translation_id, None) is not None:
+            self.ukrainian.remove(translation_id)
+            self.english.remove(translation_id)
+
+    def lookup(self, text, limit=5):
+        """Translate ``text`` using the phrasebook.
+
+        Cyrillic input is looked up on the Ukrainian side, Latin input on the
+        English side (reverse lookup).  Returns the exact match, the best
+        partial match (shortest phrase containing the query) and a few
+        other partial matches; when there are none, fuzzy ``suggestions``.
+        """
+        self.ensure_loaded()
+        key = normalize(text)
+        result = {
+            'query': text,
+            'direction': 'en-uk' if LATIN_RE.search(text or '') and not CYRILLIC_RE.search(text or '') else 'uk-en',
+            'exact': None,
+            'best_partial': None,
+            'partial': [],
+            'suggestions': [],
+        }
+        if not key:
+            return result
+
+        side, source = (self.english, 'english') if result['direction'] == 'en-uk' else (self.ukrainian, 'ukrainian')
+        with self._lock:
+            exact_ids = side.exact.get(key)
+            if exact_ids:
+                result['exact'] = self.entries[exact_ids[0]]
+
+            partial_ids = side.containing(key) | side.contained_in(key)
+            if exact_ids:
+                partial_ids.difference_update(exact_ids)
+
+            def rank(entry):
+                # Prefer the shortest phrase containing the query, then the
+                # longest phrase found inside a longer query
+                contains = key in side.keys[entry['id']]
+                length = len(entry[source])
+                return (not contains, length if contains else -length, entry['id'])
+
+            partial = heapq.nsmallest(limit, (self.entries[i] for i in partial_ids), key=rank)
+
+        result['partial'] = partial
+        result['best_partial'] = partial[0] if partial else None
+        if not exact_ids and not partial:
+            result['suggestions'] = self.suggest(text, limit)
+        return result
+
+    def suggest(self, text, limit=5):
+        """Close spellings of ``text`` (typos, transliteration) when nothing matched"""
+        from fuzzy import fuzzy_index
+
+        suggestions = []
+        for entry_id, field, score in fuzzy_index.search(text, limit):
+            entry = self.entries.get(entry_id)
+            if entry is not None:
+                suggestions.append(dict(entry, matched=field, score=score))
+        return suggestions
+
+
+phrase_index = TranslationIndex()
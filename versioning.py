@@ -0,0 +1,86 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+
+from flask import request, session, make_response
+
+from app import db
+from assets import assets
+from changefeed import changefeed
+
+
+class ModelVersions:
+    """A cheap version stamp per content model.
+
+    The stamp is the model's write count and last write time from the
+    shared ``content_version`` table (see changefeed.py), so every worker
+    hands out the same validators for the same data.  Views decorated with
+    ``conditional`` turn the stamps of the models they read into an ETag
+    and Last-Modified pair and answer revalidations with 304 before the
+    view (and so the ORM and Jinja) runs.  The static asset build is part
+    of every stamp, so pages cached before a deploy are not reused after it.
+    """
+
+    def __init__(self):
+        self._depends = {}
+
+    def depends(self, model, token):
+        """Fold ``token()`` into ``model``'s stamp, for output that changes without a write"""
+        self._depends.setdefault(model.__tablename__, []).append(token)
+
+    def stamp(self, models):
+        """(token, last_modified) for the given models.
+
+        ``last_modified`` is None when a ``depends`` token is involved, since
+        that output can change without a write to date it by.
+        """
+        versions = changefeed.versions(db.session)
+        # Pages link the current build's hashed asset URLs
+        parts = ['assets:%s' % assets.version]
+        last_modified = None
+        dated = True
+        for tag in sorted({m.__tablename__ for m in models}):
+            version, modified = versions.get(tag, (0, None))
+            parts.append('%s:%d:%s' % (tag, version, modified))
+            tokens = self._depends.get(tag, ())
+            parts.extend(str(token()) for token in tokens)
+            dated = dated and not tokens
+            if modified is not None:
+                modified = modified.replace(tzinfo=timezone.utc)
+                if last_modified is None or modified > last_modified:
+                    last_modified = modified
+        return '|'.join(parts), last_modified if dated else None
+
+    def conditional(self, *models):
+        """Emit ETag/Last-Modified for a GET view and answer revalidations with 304"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                if request.method not in ('GET', 'HEAD') or '_flashes' in session:
+                    return view(*args, **kwargs)
+
+                token, last_modified = self.stamp(models)
+                etag = hashlib.sha1(('%s|%s' % (request.full_path, token)).encode()).hexdigest()
+
+                if request.if_none_match:
+                    # Weak comparison: compressed responses carry a weak ETag
+                    not_modified = request.if_none_match.contains_weak(etag)
+                else:
+                    not_modified = (last_modified is not None and request.if_modified_since is not None
+                                    and last_modified.replace(microsecond=0) <= request.if_modified_since)
+
+                response = make_response('', 304) if not_modified else make_response(view(*args, **kwargs))
+                if response.status_code in (200, 304):
+                    # A view that encodes its own body (gzip bundles) sends
+                    # different bytes per encoding under the same token
+                    response.set_etag(etag, weak='Content-Encoding' in response.headers)
+                    if last_modified is not None:
+                        response.last_modified = last_modified
+                    # Stored, but always revalidated against the ETag
+                    response.cache_control.no_cache = True
+                return response
+            return wrapper
+        return decorator
+
+
+model_versions = ModelVersions()